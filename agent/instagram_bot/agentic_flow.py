@@ -2,7 +2,6 @@ import logging
 import json
 import datetime
 from pathlib import Path
-from openai import OpenAI
 import asyncio
 from base64 import b64decode
 
@@ -35,16 +34,19 @@ class AgentResponse(BaseModel):
 # Enable recursive models
 TodoItem.update_forward_refs()
 
-from .config import OPENAI_API_KEY
 from . import instagram
 from . import image_utils
+from . import publish_queue
+from .openai_client import get_client
+from .posting_gate import describe, get_posting_gate
+from .tenants import data_path, start_thread, tenant_file
+from .ukraine_calendar import days_between
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+MAX_CALENDAR_DAYS = 366
 
 # --- Tool Definitions ---
 
@@ -54,7 +56,7 @@ async def sync_posts(reply_message, reply_photo):
     This ensures the agent has the most up-to-date information before generating new content.
     """
     try:
-        instagram.sync_instagram_posts()
+        await asyncio.to_thread(instagram.sync_instagram_posts)
         return "Successfully synced Instagram posts and updated post history."
     except Exception as e:
         logger.error(f"Error syncing posts: {e}", exc_info=True)
@@ -65,15 +67,15 @@ async def get_history(reply_message, reply_photo):
     Retrieves the history of previously published Instagram posts from the local file.
     This is useful for avoiding content repetition and understanding what has been posted before.
     """
-    instagram.sync_instagram_posts()
-    history_path = Path("data/post_history.md")
+    await asyncio.to_thread(instagram.sync_instagram_posts)
+    history_path = data_path("post_history.md")
     return history_path.read_text(encoding="utf-8")
 
 
 def llm_generate_post_image(image_prompt: str) -> bytes:
     """Generates an image for the post and returns it as bytes."""
     try:
-        response = client.images.generate(
+        response = get_client().images.generate(
             model="gpt-image-1",
             prompt=image_prompt,
             size="1024x1024",
@@ -96,17 +98,17 @@ async def generate_post_image(image_prompt: str, reply_message, reply_photo):
     """
     try:
         logger.info("Generating post image.")
-        image_bytes = llm_generate_post_image(image_prompt)
+        image_bytes = await asyncio.to_thread(llm_generate_post_image, image_prompt)
         logger.info("Generated post image.")
 
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_dir = Path("data/future_posts/temp_images")
+        temp_dir = data_path("future_posts", "temp_images")
         temp_dir.mkdir(parents=True, exist_ok=True)
         # image_path = temp_dir / f"image_{timestamp}.png"
         # image_path.write_bytes(image_bytes)
 
         # Preprocess the image
-        processed_image_data = image_utils.image_preprocessing(image_bytes)
+        processed_image_data = await asyncio.to_thread(image_utils.image_preprocessing, image_bytes)
         processed_image_path = temp_dir / f"image_{timestamp}_processed.png"
         processed_image_path.write_bytes(processed_image_data)
         logger.info(f"Image saved temporarily to {processed_image_path}")
@@ -117,6 +119,33 @@ async def generate_post_image(image_prompt: str, reply_message, reply_photo):
         logger.error(f"Error generating post image: {e}", exc_info=True)
         return f"An error occurred while generating post image: {e}"
 
+async def check_similar_images(image_path: str, reply_message, reply_photo, max_distance: int = None):
+    """
+    Checks whether an image is a near-duplicate of the image of any drafted or posted post.
+    """
+    # numpy is only needed once the agent actually works with images
+    from .image_index import get_image_index, DEFAULT_MAX_DISTANCE
+
+    try:
+        if max_distance is None:
+            max_distance = DEFAULT_MAX_DISTANCE
+        image_file = Path(image_path)
+        if not image_file.exists():
+            return json.dumps({"status": "error", "message": f"Image file not found at {image_path}"})
+
+        index = get_image_index()
+        index.sync()
+        similar = index.find_similar(image_file.read_bytes(), max_distance=max_distance)
+        logger.info(f"Found {len(similar)} images similar to {image_path}")
+        return json.dumps({
+            "status": "success",
+            "is_near_duplicate": bool(similar),
+            "similar_images": similar
+        })
+    except Exception as e:
+        logger.error(f"Error checking similar images: {e}", exc_info=True)
+        return json.dumps({"status": "error", "message": f"An error occurred while checking similar images: {e}"})
+
 async def save_post_draft(idea: str, post_text: str, image_path: str, reply_message, reply_photo):
     """
     Saves a generated post (idea, text, and image) as a draft for review.
@@ -132,7 +161,7 @@ async def save_post_draft(idea: str, post_text: str, image_path: str, reply_mess
 
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         post_dir_name = f"post_{timestamp}"
-        post_dir = Path("data/future_posts") / post_dir_name
+        post_dir = data_path("future_posts", post_dir_name)
         post_dir.mkdir(parents=True, exist_ok=True)
 
         (post_dir / "post.txt").write_text(post_text, encoding="utf-8")
@@ -142,6 +171,21 @@ async def save_post_draft(idea: str, post_text: str, image_path: str, reply_mess
         # Clean up the temporary image file
         image_file.unlink()
 
+        try:
+            from .image_index import get_image_index
+            get_image_index().add(post_dir / "post_processed.png")
+        except Exception as e:
+            logger.error(f"Failed to add draft image to image index: {e}", exc_info=True)
+
+        def _prepare_upload():
+            try:
+                instagram.prepare_upload_asset(post_dir)
+            except Exception as e:
+                logger.error(f"Failed to prepare upload asset for {post_dir}: {e}", exc_info=True)
+
+        # Ready before the draft is approved, so publishing only has to upload
+        start_thread(_prepare_upload)
+
         logger.info(f"Post draft saved in: {post_dir}")
 
         return json.dumps({
@@ -160,8 +204,13 @@ async def publish_post(post_directory_name: str, reply_message, reply_photo):
     """
     try:
         logger.info(f"Publishing post from directory: {post_directory_name}")
-        media = instagram.make_post(post_directory_name)
-        return f"Post successfully published! View it at: https://www.instagram.com/p/{media.code}"
+        hold = get_posting_gate().check()
+        if hold:
+            return f"The post was not published. {describe(hold)}. The admin can lift the hold with /posting_gate open."
+        record = await asyncio.to_thread(publish_queue.publish_post, post_directory_name)
+        if record["already_published"]:
+            return f"Post was already published earlier: https://www.instagram.com/p/{record['media_code']}"
+        return f"Post successfully published! View it at: https://www.instagram.com/p/{record['media_code']}"
     except Exception as e:
         logger.error(f"Error publishing post: {e}", exc_info=True)
         return f"An error occurred while publishing the post: {e}"
@@ -173,7 +222,7 @@ async def list_drafted_posts(reply_message, reply_photo):
     This is useful for checking if there is existing content that can be scheduled.
     """
     try:
-        drafts_dir = Path("data/future_posts")
+        drafts_dir = data_path("future_posts")
         drafts_dir.mkdir(parents=True, exist_ok=True)
         drafted_posts = [
             {
@@ -210,7 +259,7 @@ async def read_data_file(file_name: str, reply_message, reply_photo):
             logger.warning(f"Attempted directory traversal: {file_name}")
             return "Error: Invalid file name. Directory traversal is not allowed."
 
-        file_path = Path("data") / file_name
+        file_path = tenant_file(file_name)
         
         if not file_path.is_file():
             return f"Error: File '{file_name}' not found or is not a regular file in the data directory."
@@ -221,6 +270,25 @@ async def read_data_file(file_name: str, reply_message, reply_photo):
         logger.error(f"Error reading data file '{file_name}': {e}", exc_info=True)
         return f"An error occurred while reading the file: {e}"
 
+
+async def get_calendar(start_date: str, days: int, reply_message, reply_photo):
+    """
+    Lists Ukrainian public holidays, memorial days and observances in a date range,
+    so that posts can be planned around them, for at most MAX_CALENDAR_DAYS days. Computed offline.
+    """
+    try:
+        today = datetime.date.today()
+        start = datetime.date.fromisoformat(start_date) if start_date else today
+        calendar_days = days_between(start, start + datetime.timedelta(days=min(max(days, 1), MAX_CALENDAR_DAYS) - 1))
+        return json.dumps({
+            "status": "ok",
+            "today": today.isoformat(),
+            "days": calendar_days,
+            "note": "On memorial days avoid entertaining posts; on holidays consider a themed post."
+        }, ensure_ascii=False)
+    except (ValueError, OverflowError) as e:
+        return json.dumps({"status": "error", "message": f"Invalid start_date, expected YYYY-MM-DD: {e}"})
+
 async def save_schedule(schedule_data: list, reply_message, reply_photo):
     """
     Saves the generated schedule to the 'data/schedule/generated.json' file.
@@ -228,13 +296,18 @@ async def save_schedule(schedule_data: list, reply_message, reply_photo):
     The input should be a list of schedule entries.
     """
     try:
-        schedule_path = Path("data/schedule/generated.json")
+        schedule_path = data_path("schedule", "generated.json")
         schedule_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(schedule_path, 'w', encoding='utf-8') as f:
+        # Write to a temporary file and rename, so the scheduler never reads a half-written file
+        tmp_path = schedule_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(schedule_data, f, indent=4)
-            
+        tmp_path.replace(schedule_path)
+
         logger.info(f"Schedule saved to {schedule_path}")
+        from .scheduler import request_reload
+        request_reload()
         return f"Successfully saved schedule to {schedule_path}."
     except Exception as e:
         logger.error(f"Error saving schedule: {e}", exc_info=True)
@@ -247,7 +320,7 @@ async def search_posts_by_hashtag(hashtag: str, reply_message, reply_photo, amou
     """
     try:
         logger.info(f"Searching for posts with hashtag: {hashtag}")
-        posts = instagram.search_posts_by_hashtag(hashtag, amount)
+        posts = await asyncio.to_thread(instagram.search_posts_by_hashtag, hashtag, amount)
         return json.dumps({
             "status": "success",
             "posts": posts
@@ -263,7 +336,7 @@ async def describe_image(image_url: str, reply_message, reply_photo, question: s
     """
     try:
         logger.info(f"Describing image from URL: {image_url}")
-        description = image_utils.describe_image_from_url(image_url, question=question)
+        description = await asyncio.to_thread(image_utils.describe_image_from_url, image_url, question=question)
         return json.dumps({
             "status": "success",
             "description": description
@@ -273,12 +346,44 @@ async def describe_image(image_url: str, reply_message, reply_photo, question: s
         return json.dumps({"status": "error", "message": f"An error occurred while describing the image: {e}"})
 
 
+async def describe_images(image_urls: list[str], reply_message, reply_photo, question: str = "What’s in this image?"):
+    """
+    Describes several images from URLs in one go.
+    """
+    try:
+        logger.info(f"Describing {len(image_urls)} images")
+        descriptions = await asyncio.to_thread(image_utils.describe_images_from_urls, image_urls, question=question)
+        failed = [url for url in image_urls if url not in descriptions]
+        return json.dumps({
+            "status": "success" if not failed else "partial_success",
+            "descriptions": descriptions,
+            "failed": failed
+        })
+    except Exception as e:
+        logger.error(f"Error describing images: {e}", exc_info=True)
+        return json.dumps({"status": "error", "message": f"An error occurred while describing the images: {e}"})
+
+
+async def prepare_story(post_url: str, reply_message, reply_photo, caption: str = ""):
+    """
+    Starts rendering the story clip for a repost in the background, so repost_photo only has to upload it.
+    """
+    def _prepare():
+        try:
+            instagram.prepare_story_repost(post_url, caption=caption)
+        except Exception as e:
+            logger.error(f"Error preparing story for {post_url}: {e}", exc_info=True)
+
+    start_thread(_prepare)
+    return "Story preparation started. Call repost_photo with the same post URL and caption to publish it."
+
+
 async def repost_photo(post_url: str, reply_message, reply_photo, caption: str = ""):
     """
     Reposts a photo to story from a given instagram post URL.
     """
     try:
-        instagram.post_story_repost_photo(post_url, caption=caption)
+        await asyncio.to_thread(instagram.post_story_repost_photo, post_url, caption=caption)
         return "Photo successfully reposted to story."
     except Exception as e:
         logger.error(f"Error reposting photo: {e}", exc_info=True)
@@ -301,13 +406,17 @@ async def post_poll(caption: str, options: list[str], reply_message, reply_photo
 TOOLS = {
     "get_history": {"type": "function", "function": {"name": "get_history", "description": "Retrieves the history of previously published posts. Never call this tool unless you are sure you need it.", "strict": True, "parameters": {"type": "object", "properties": {}, "additionalProperties": False}}},
     "read_data_file": {"type": "function", "function": {"name": "read_data_file", "description": "Reads the content of a specified file. Useful for accessing the .md files, content plan or other files. Only files directly in 'data' are allowed (no subdirectories).", "strict": True, "parameters": {"type": "object", "properties": {"file_name": {"type": "string", "description": "The name of the file to read from the 'data' directory."}}, "additionalProperties": False, "required": ["file_name"]}}},
+    "get_calendar": {"type": "function", "function": {"name": "get_calendar", "description": "Lists Ukrainian public holidays, memorial days and observances (kind: holiday, memorial, observance) between start_date and the following days. Use it when planning posts for specific dates.", "strict": True, "parameters": {"type": "object", "properties": {"start_date": {"type": "string", "description": "The first date, in YYYY-MM-DD format, or an empty string for today."}, "days": {"type": "integer", "description": "The number of days to list, e.g. 7 for a week, at most 366."}}, "additionalProperties": False, "required": ["start_date", "days"]}}},
     "save_schedule": {"type": "function", "function": {"name": "save_schedule", "description": "Saves the generated schedule to 'data/schedule/generated.json'. To run post on specific day, unit should be `weeks`", "strict": True, "parameters": {"type": "object", "additionalProperties": False, "properties": {"schedule_data": {"type": "array", "items": {"type": "object",  "additionalProperties": False, "required": ["task_name", "schedule", "task_args"], "properties": {"task_name": {"type": "string"}, "schedule": {"type": "object", "additionalProperties": False, "required": ["unit", "day", "at"], "properties": {"unit": {"type": "string"}, "day": {"type": "string"}, "at": {"type": "string"}}}, "task_args": {"type": "object", "additionalProperties": False, "required": ["post_directory_name"], "properties": {"post_directory_name": {"type": "string"}}}}}, "description": "A list of schedule entries to save. Put schedule data in the following format: [{\"task_name\": \"task_post\", \"schedule\": {\"unit\": \"weeks\", \"day\": \"monday\", \"at\": \"12:00\"}, \"task_args\": {\"post_directory_name\": \"...\"}}, {\"task_name\": \"task_story\", \"schedule\": {\"unit\": \"weeks\", \"day\": \"tuesday\", \"at\": \"15:00\"}, \"task_args\": {\"story_directory_name\": \"...\"}}]"}}, "additionalProperties": False, "required": ["schedule_data"]}}},
     "generate_post_image": {"type": "function", "function": {"name": "generate_post_image", "description": "Generates an image for an Instagram post based on the post text. Response contains the path to the image file.", "strict": True, "parameters": {"type": "object", "properties": {"image_prompt": {"type": "string", "description": "The prompt for the image generation model."}}, "additionalProperties": False, "required": ["image_prompt"]}}},
+    "check_similar_images": {"type": "function", "function": {"name": "check_similar_images", "description": "Checks whether a generated image is visually near-identical to the image of any drafted or already posted post. Call it before saving a draft.", "strict": True, "parameters": {"type": "object", "properties": {"image_path": {"type": "string", "description": "The path to the image returned by generate_post_image."}, "max_distance": {"type": "integer", "description": "Maximum Hamming distance (0-64) between perceptual hashes to treat images as near-duplicates. Use 10 unless told otherwise."}}, "additionalProperties": False, "required": ["image_path", "max_distance"]}}},
     "save_post_draft": {"type": "function", "function": {"name": "save_post_draft", "description": "Saves a generated post (idea, text, and image) as a draft for review. Never call this tool if you didn't generate the image first.", "strict": True, "parameters": {"type": "object", "properties": {"idea": {"type": "string"}, "post_text": {"type": "string"}, "image_path": {"type": "string"}}, "additionalProperties": False, "required": ["idea", "post_text", "image_path"]}}},
     "publish_post": {"type": "function", "function": {"name": "publish_post", "description": "Publishes a staged post draft to Instagram. Never call this tool if you didn't save the post draft first. Also, never call this tool if you don't have an explicit confirmation from user that they want to publish the post.", "strict": True, "parameters": {"type": "object", "properties": {"post_directory_name": {"type": "string", "description": "The name of the post directory inside 'data/future_posts' to publish."}}, "additionalProperties": False, "required": ["post_directory_name"]}}},
     "list_drafted_posts": {"type": "function", "function": {"name": "list_drafted_posts", "description": "Lists all previously drafted posts that are pending for review or publishing.", "strict": True, "parameters": {"type": "object", "properties": {}, "additionalProperties": False}}},
     "search_posts_by_hashtag": {"type": "function", "function": {"name": "search_posts_by_hashtag", "description": "Searches for 10 posts on Instagram by a given hashtag. It returns a list of posts, with likes, text, image url, and comments number.", "strict": True, "parameters": {"type": "object", "properties": {"hashtag": {"type": "string", "description": "The hashtag to search for, without the '#' symbol."}, "amount": {"type": "integer", "description": "The number of posts to search for."}}, "additionalProperties": False, "required": ["hashtag", "amount"]}}},
     "describe_image": {"type": "function", "function": {"name": "describe_image", "description": "Describes an image from a URL (image_url). Note that instagram post link like https://www.instagram.com/p/... is NOT an image.", "strict": True, "parameters": {"type": "object", "properties": {"image_url": {"type": "string", "description": "The URL of the image to describe. Make sure it's a full url with all parameters, absolutely same as returned by other tools."}, "question": {"type": "string", "description": "The question to ask about the image."}}, "additionalProperties": False, "required": ["image_url", "question"]}}},
+    "describe_images": {"type": "function", "function": {"name": "describe_images", "description": "Describes several images from URLs (image_urls) in a single call. Prefer it over calling describe_image for each candidate. Returns descriptions keyed by image URL.", "strict": True, "parameters": {"type": "object", "properties": {"image_urls": {"type": "array", "items": {"type": "string"}, "description": "The URLs of the images to describe. Make sure they are full urls with all parameters, absolutely same as returned by other tools."}, "question": {"type": "string", "description": "The question to ask about each image."}}, "additionalProperties": False, "required": ["image_urls", "question"]}}},
+    "prepare_story": {"type": "function", "function": {"name": "prepare_story", "description": "Starts rendering the story for a repost of the given instagram post URL in the background. Call it as soon as the post and caption are chosen; repost_photo with the same post URL and caption will then only upload it.", "strict": True, "parameters": {"type": "object", "properties": {"post_url": {"type": "string", "description": "The URL of the post to repost."}, "caption": {"type": "string", "description": "The caption for the reposted photo."}}, "additionalProperties": False, "required": ["post_url", "caption"]}}},
     "repost_photo": {"type": "function", "function": {"name": "repost_photo", "description": "Reposts a photo to story from a given instagram post URL.", "strict": True, "parameters": {"type": "object", "properties": {"post_url": {"type": "string", "description": "The URL of the post to repost."}, "caption": {"type": "string", "description": "The caption for the reposted photo."}}, "additionalProperties": False, "required": ["post_url", "caption"]}}},
     "post_poll": {"type": "function", "function": {"name": "post_poll", "description": "Posts a poll to story with a given caption and options. The input should be a list of options.", "strict": True, "parameters": {"type": "object", "properties": {"caption": {"type": "string", "description": "The caption for the poll."}, "options": {"type": "array", "items": {"type": "string"}, "description": "The options for the poll."}}, "additionalProperties": False, "required": ["caption", "options"]}}},
 }
@@ -324,17 +433,19 @@ async def agentic_flow(text: str, context: dict, reply_message, reply_photo, aut
     # Initialize chat history if not present in the context
     if 'chat_history' not in context:
         try:
+            # Each tenant may override the shared guides with its own copies
+            shared_data = Path(__file__).parent.parent / "data"
             if auto_mode:
-                agent_instructions = (Path(__file__).parent.parent / "data/auto_agent.md").read_text(encoding="utf-8")
+                agent_instructions = tenant_file("auto_agent.md", shared_data / "auto_agent.md").read_text(encoding="utf-8")
             else:
-                agent_instructions = (Path(__file__).parent.parent / "data/manual_agent.md").read_text(encoding="utf-8")
+                agent_instructions = tenant_file("manual_agent.md", shared_data / "manual_agent.md").read_text(encoding="utf-8")
 
             system_prompt = (
                 agent_instructions + 
                 "\n\n" + 
-                (Path(__file__).parent.parent / "data/rules.md").read_text(encoding="utf-8") +
+                tenant_file("rules.md", shared_data / "rules.md").read_text(encoding="utf-8") +
                 "\n\nContent plan (content_plan.md file):" +
-                (Path(__file__).parent.parent / "data/content_plan.md").read_text(encoding="utf-8")
+                tenant_file("content_plan.md", shared_data / "content_plan.md").read_text(encoding="utf-8")
             )
             context['chat_history'] = [
                 {"role": "system", "content": system_prompt}
@@ -356,7 +467,8 @@ async def agentic_flow(text: str, context: dict, reply_message, reply_photo, aut
     try:
         # First API call to get tool calls or a direct response
         # See data/rules.md and AgentResponse (Pydantic) for required response format
-        response = client.chat.completions.parse(
+        response = await asyncio.to_thread(
+            get_client().chat.completions.parse,
             model=model,
             messages=context['chat_history'],
             tools=tools_functions,
@@ -373,13 +485,17 @@ async def agentic_flow(text: str, context: dict, reply_message, reply_photo, aut
             available_tools = {
                 "get_history": get_history,
                 "read_data_file": read_data_file,
+                "get_calendar": get_calendar,
                 "save_schedule": save_schedule,
                 "generate_post_image": generate_post_image,
+                "check_similar_images": check_similar_images,
                 "save_post_draft": save_post_draft,
                 "list_drafted_posts": list_drafted_posts,
                 "publish_post": publish_post,
                 "search_posts_by_hashtag": search_posts_by_hashtag,
                 "describe_image": describe_image,
+                "describe_images": describe_images,
+                "prepare_story": prepare_story,
                 "repost_photo": repost_photo,
                 "post_poll": post_poll,
             }
@@ -418,7 +534,8 @@ async def agentic_flow(text: str, context: dict, reply_message, reply_photo, aut
                 )
 
             # Second API call to get the final response after tool execution
-            response = client.chat.completions.parse(
+            response = await asyncio.to_thread(
+                get_client().chat.completions.parse,
                 model=model,
                 messages=context['chat_history'],
                 response_format=AgentResponse
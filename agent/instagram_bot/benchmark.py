@@ -0,0 +1,254 @@
+"""
+Benchmarks for the image pipeline.
+
+Runs every stage against synthetic fixtures of varied sizes and modes and reports
+latency percentiles, peak memory and output size. Each (stage, fixture) pair runs in
+a fresh worker process, so peak RSS is measured in isolation.
+
+    python -m instagram_bot.benchmark
+    python -m instagram_bot.benchmark --stages story --iterations 1
+    python -m instagram_bot.benchmark --save-baseline bench_baseline.json
+    python -m instagram_bot.benchmark --compare bench_baseline.json --threshold 0.2
+"""
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SIZES = [320, 1024, 2048]
+# fixture name -> (PIL mode, save format)
+FIXTURE_KINDS = {
+    "rgb_png": ("RGB", "PNG"),
+    "rgba_png": ("RGBA", "PNG"),
+    "palette_png": ("P", "PNG"),
+    "jpeg": ("RGB", "JPEG"),
+    "webp": ("RGB", "WEBP"),
+}
+DEFAULT_STAGES = ["resize_image", "make_thumbnail", "image_preprocessing"]
+ALL_STAGES = DEFAULT_STAGES + ["story", "story_fast"]
+
+
+def make_fixture(kind: str, size: int) -> bytes:
+    """Builds a deterministic synthetic image: a gradient with noise, so encoders have real work to do."""
+    import numpy as np
+    from PIL import Image
+
+    mode, image_format = FIXTURE_KINDS[kind]
+    rng = np.random.default_rng(size)
+    x = np.linspace(0, 255, size, dtype=np.float32)
+    gradient = (x[None, :] + x[:, None]) / 2
+    channels = [gradient, gradient[::-1], gradient.T]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 12, (size, size, 3))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    if mode == "RGBA":
+        alpha = Image.fromarray(np.clip(gradient, 0, 255).astype(np.uint8), "L")
+        image.putalpha(alpha)
+    elif mode == "P":
+        image = image.quantize(256)
+
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue()
+
+
+def _run_stage(stage: str, data: bytes, workdir: Path) -> int:
+    """Runs one stage once and returns the size of its output in bytes."""
+    from . import image_utils
+
+    if stage == "resize_image":
+        return len(image_utils.resize_image(data, 320, 320))
+    if stage == "make_thumbnail":
+        return len(image_utils.make_thumbnail(data))
+    if stage == "image_preprocessing":
+        return len(image_utils.image_preprocessing(data))
+    if stage == "story":
+        from instagrapi.story import StoryBuilder
+
+        source = workdir / "story_source.png"
+        source.write_bytes(image_utils.resize_image(data, 720, 720))
+        buildout = StoryBuilder(source, "", bgpath=Path("data/background1.png")).photo(15)
+        output_size = Path(buildout.path).stat().st_size
+        Path(buildout.path).unlink()
+        return output_size
+    if stage == "story_fast":
+        from . import story
+
+        source = workdir / "story_source.png"
+        source.write_bytes(image_utils.resize_image(data, 720, 720))
+        frame_path = workdir / "story_frame.png"
+        story.compose_story_frame(source, "", Path("data/background1.png")).save(frame_path)
+        output_path = workdir / "story_fast.mp4"
+        story.encode_still_video(frame_path, output_path)
+        return output_path.stat().st_size
+    raise ValueError(f"Unknown stage '{stage}'")
+
+
+def _measure(stage: str, fixture: str, data: bytes, iterations: int, warmup: int) -> dict:
+    """Worker process entry point: measures one stage on one fixture."""
+    logging.disable(logging.CRITICAL)
+    from . import image_utils  # noqa: F401  (import cost is not part of the measurement)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        # The warm-up is included: it already reaches the stage's peak
+        _reset_peak_rss()
+        rss_before = _read_rss_kb("VmRSS")
+        for _ in range(warmup):
+            _run_stage(stage, data, workdir)
+
+        tracemalloc.start()
+        latencies = []
+        output_bytes = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            output_bytes = _run_stage(stage, data, workdir)
+            latencies.append((time.perf_counter() - start) * 1000)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = _read_rss_kb("VmHWM")
+
+    return {
+        "stage": stage,
+        "fixture": fixture,
+        "input_bytes": len(data),
+        "iterations": iterations,
+        "p50_ms": _percentile(latencies, 50),
+        "p90_ms": _percentile(latencies, 90),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+        "peak_rss_kb": max(rss_after - rss_before, 0),
+        "peak_python_kb": traced_peak // 1024,
+        "output_bytes": output_bytes,
+    }
+
+
+def _reset_peak_rss():
+    """Resets the kernel's RSS high-water mark (VmHWM) of this process, where supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _read_rss_kb(field: str) -> int:
+    """
+    Reads VmRSS or VmHWM from /proc. ru_maxrss is not used on Linux because it
+    survives execve, so spawned workers would report the parent's peak.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # macOS reports ru_maxrss in bytes, Linux in KiB
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * percent / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_benchmarks(stages: list, kinds: list, sizes: list, iterations: int, warmup: int = 1) -> list:
+    """Runs all (stage, fixture) combinations, one fresh worker process each."""
+    # Fixtures are built here, so building them does not count towards the workers' peak memory
+    fixtures = {f"{kind}_{size}": make_fixture(kind, size) for kind in kinds for size in sizes}
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as executor:
+        for stage in stages:
+            stage_iterations = 1 if stage.startswith("story") else iterations
+            stage_warmup = 0 if stage.startswith("story") else warmup
+            for fixture, data in fixtures.items():
+                result = executor.submit(_measure, stage, fixture, data, stage_iterations, stage_warmup).result()
+                print(_format_row(result), flush=True)
+                results.append(result)
+    return results
+
+
+def compare_with_baseline(results: list, baseline: list, threshold: float) -> list:
+    """
+    Returns a list of human-readable regressions: metrics that grew by more than
+    `threshold` (a fraction, 0.2 = 20%) compared to the baseline run.
+    """
+    baseline_by_key = {(r["stage"], r["fixture"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get((result["stage"], result["fixture"]))
+        if not base:
+            continue
+        for metric in ("p50_ms", "p90_ms", "peak_rss_kb", "output_bytes"):
+            old, new = base[metric], result[metric]
+            if old > 0 and (new - old) / old > threshold:
+                regressions.append(
+                    f"{result['stage']}/{result['fixture']}: {metric} {old:.1f} -> {new:.1f} (+{(new - old) / old:.0%})"
+                )
+    return regressions
+
+
+def _format_row(result: dict) -> str:
+    return (
+        f"{result['stage']:<20} {result['fixture']:<18} "
+        f"p50 {result['p50_ms']:8.1f}ms  p90 {result['p90_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  "
+        f"rss +{result['peak_rss_kb']:7d}KiB  py {result['peak_python_kb']:6d}KiB  "
+        f"out {result['output_bytes']:9d}B"
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the image pipeline.")
+    parser.add_argument("--stages", nargs="+", choices=ALL_STAGES, default=DEFAULT_STAGES,
+                        help="Stages to benchmark. 'story' (StoryBuilder) needs ImageMagick and is slow; 'story_fast' is the ffmpeg still-image path.")
+    parser.add_argument("--fixtures", nargs="+", choices=list(FIXTURE_KINDS), default=list(FIXTURE_KINDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--save-baseline", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Compare the results with a saved baseline JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative growth treated as a regression when comparing (default: 0.2).")
+    args = parser.parse_args(argv)
+
+    if not Path("logo.png").exists():
+        print("Warning: logo.png not found in the working directory, run from the 'agent' directory "
+              "to benchmark the full preprocessing path.", file=sys.stderr)
+
+    results = run_benchmarks(args.stages, args.fixtures, args.sizes, args.iterations)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
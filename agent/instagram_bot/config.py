@@ -8,6 +8,11 @@ INSTAGRAM_USERNAME = os.getenv("INSTAGRAM_USERNAME")
 INSTAGRAM_PASSWORD = os.getenv("INSTAGRAM_PASSWORD")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ADMIN_TELEGRAM_ID = os.getenv("ADMIN_TELEGRAM_ID")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+SCHEDULER_MISFIRE_GRACE_MINUTES = int(os.getenv("SCHEDULER_MISFIRE_GRACE_MINUTES", "180"))
+PREFLIGHT_MINUTES = int(os.getenv("PREFLIGHT_MINUTES", "10"))
+TENANTS_FILE = os.getenv("TENANTS_FILE", "data/tenants.json")
+NEWS_WATCH_MINUTES = float(os.getenv("NEWS_WATCH_MINUTES", "0"))
 
 SAVED_PROMPTS = {
     "WEEKLY_PLANNING": "Follow the `weekly_planning_guide.md` to generate a schedule for the next week. Read the `create_post.md` guide before generating posts.",
@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+from .feed_registry import FeedSource
+
+logger = logging.getLogger(__name__)
+
+FEED_CACHE_PATH = Path("data/feed_cache.json")
+FEED_TIMEOUT = 20
+MAX_PARALLEL_FEEDS = 8
+# A feed is polled about as often as it publishes this many new entries
+NEW_ENTRIES_PER_POLL = 1
+# Weight of the latest observation in the smoothed publish rate
+RATE_SMOOTHING = 0.3
+
+
+def parse_entries(content: bytes) -> list:
+    """Parses a feed document into plain, JSON-serializable entries. Entries without a date are skipped."""
+    import feedparser
+
+    feed = feedparser.parse(content)
+    entries = []
+    for entry in feed.entries:
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        if not parsed:
+            continue
+        entries.append({
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "summary": entry.get("summary", ""),
+            "published": entry.get("published", ""),
+            "date": date(*parsed[:3]).isoformat(),
+        })
+    return entries
+
+
+class FeedFetcher:
+    """
+    Fetches RSS feeds in parallel over one pooled HTTP client.
+    The ETag / Last-Modified validators of each feed and the entries parsed from its last
+    full response are kept on disk, so a feed that has not changed answers 304 Not Modified
+    and is neither downloaded nor parsed again. Latency and bytes of the last fetch of each
+    feed are kept in `stats`.
+
+    Each feed is polled on its own interval derived from its observed publish rate (new entries
+    per hour, smoothed), scaled by its weight and bounded by its min/max interval; a feed that
+    fails is retried with exponential backoff. Feeds that are not due return their cached entries.
+    """
+
+    def __init__(self, cache_path: Path = FEED_CACHE_PATH, timeout: float = FEED_TIMEOUT,
+                 max_workers: int = MAX_PARALLEL_FEEDS):
+        self.cache_path = Path(cache_path)
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        # feed url -> {"etag": ..., "last_modified": ..., "entries": [...]}
+        self.feeds = {}
+        # feed url -> {"status": ..., "latency_ms": ..., "bytes": ..., "entries": ..., "fetched_at": ...}
+        self.stats = {}
+        # feed url -> {"rate": ..., "interval": ..., "next_poll": ..., "last_success": ..., "errors": ...}
+        self.schedule = {}
+        self._http = None
+        self._load()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            self.feeds = data.get("feeds", {})
+            self.stats = data.get("stats", {})
+            self.schedule = data.get("schedule", {})
+        except json.JSONDecodeError as e:
+            logger.error(f"Could not read feed cache {self.cache_path}, starting empty: {e}")
+
+    def _save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = json.dumps({"feeds": self.feeds, "stats": self.stats, "schedule": self.schedule}, ensure_ascii=False)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.replace(self.cache_path)
+
+    def _client(self) -> httpx.Client:
+        # Kept between runs, so connections to the feed hosts are reused
+        with self.lock:
+            if self._http is None:
+                self._http = httpx.Client(
+                    follow_redirects=True,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers),
+                )
+        return self._http
+
+    def fetch(self, url: str, timeout: float = None) -> list:
+        """Returns the entries of a feed, from the cache if the server reports it unchanged."""
+        with self.lock:
+            cached = self.feeds.get(url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        started = time.perf_counter()
+        response = self._client().get(url, headers=headers, timeout=timeout or self.timeout)
+        if response.status_code == 304 and "entries" in cached:
+            entries = cached["entries"]
+        else:
+            response.raise_for_status()
+            entries = parse_entries(response.content)
+            with self.lock:
+                self.feeds[url] = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "entries": entries,
+                }
+        stats = {
+            "status": response.status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000),
+            "bytes": response.num_bytes_downloaded,
+            "entries": len(entries),
+            "fetched_at": time.time(),
+        }
+        with self.lock:
+            self.stats[url] = stats
+        logger.info(f"Fetched {url}: HTTP {stats['status']} in {stats['latency_ms']} ms, "
+                    f"{stats['bytes']} bytes, {stats['entries']} entries")
+        return entries
+
+    def cached_entries(self, url: str) -> list:
+        with self.lock:
+            return self.feeds.get(url, {}).get("entries", [])
+
+    def is_due(self, source: FeedSource, now: float = None) -> bool:
+        with self.lock:
+            next_poll = self.schedule.get(source.url, {}).get("next_poll", 0)
+        return next_poll <= (now or time.time())
+
+    def _poll(self, source: FeedSource) -> list:
+        """Fetches a feed and schedules its next poll from its publish rate, or backs off after an error."""
+        previous_links = {entry["link"] for entry in self.cached_entries(source.url)}
+        now = time.time()
+        with self.lock:
+            state = dict(self.schedule.get(source.url, {}))
+        try:
+            entries = self.fetch(source.url, timeout=source.timeout)
+        except Exception as e:
+            state["errors"] = state.get("errors", 0) + 1
+            delay = min(source.max_interval, source.min_interval * 2 ** state["errors"])
+            state["next_poll"] = now + delay
+            with self.lock:
+                self.schedule[source.url] = state
+            logger.error(f"Error fetching RSS from {source.name} ({state['errors']} in a row), retrying in {delay / 60:.0f} min: {e}")
+            return self.cached_entries(source.url)
+
+        new_entries = sum(entry["link"] not in previous_links for entry in entries)
+        if state.get("last_success") and previous_links:
+            hours = max(now - state["last_success"], 60) / 3600
+            observed = new_entries / hours
+            rate = state.get("rate")
+            state["rate"] = observed if rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+        if state.get("rate"):
+            interval = 3600 * NEW_ENTRIES_PER_POLL / state["rate"] / source.weight
+        else:
+            # Unknown rate: start fast; nothing published so far: back off gradually
+            interval = state.get("interval", source.min_interval / 2) * 2
+        state["interval"] = min(max(interval, source.min_interval), source.max_interval)
+        state["next_poll"] = now + state["interval"]
+        state["last_success"] = now
+        state["errors"] = 0
+        with self.lock:
+            self.schedule[source.url] = state
+        logger.info(f"{source.name}: {new_entries} new entries, next poll in {state['interval'] / 60:.0f} min")
+        return entries
+
+    def fetch_all(self, sources: list, force: bool = False) -> dict:
+        """
+        Fetches the feeds that are due (all of them with `force`) in parallel. Returns feed url -> entries;
+        feeds that are not due, or fail, return their cached entries.
+        """
+        started = time.perf_counter()
+        now = time.time()
+        due = [source for source in sources if force or self.is_due(source, now)]
+        results = {source.url: self.cached_entries(source.url) for source in sources}
+        if due:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results.update(zip([source.url for source in due], executor.map(self._poll, due)))
+            self._save()
+        logger.info(f"Fetched {len(due)} of {len(sources)} feeds in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return results
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_feed_fetcher() -> FeedFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = FeedFetcher()
+    return _fetcher
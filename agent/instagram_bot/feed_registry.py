@@ -0,0 +1,48 @@
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FEEDS_FILE_NAME = "feeds.json"
+DEFAULT_TIMEOUT = 20
+DEFAULT_MIN_INTERVAL_MINUTES = 10
+DEFAULT_MAX_INTERVAL_MINUTES = 6 * 60
+
+
+class FeedSource:
+    """
+    One news feed from the registry. `weight` scales how often the feed is polled relative to
+    its publish rate (2 = twice as often); the interval stays within min/max_interval_minutes.
+    """
+
+    def __init__(self, url: str, name: str = None, enabled: bool = True, weight: float = 1.0,
+                 timeout: float = DEFAULT_TIMEOUT, min_interval_minutes: float = DEFAULT_MIN_INTERVAL_MINUTES,
+                 max_interval_minutes: float = DEFAULT_MAX_INTERVAL_MINUTES):
+        if weight <= 0:
+            raise ValueError(f"Feed {url} must have a positive weight, got {weight}")
+        if min_interval_minutes > max_interval_minutes:
+            raise ValueError(f"Feed {url} has min_interval_minutes above max_interval_minutes")
+        self.url = url
+        self.name = name or url
+        self.enabled = enabled
+        self.weight = weight
+        self.timeout = timeout
+        self.min_interval = min_interval_minutes * 60
+        self.max_interval = max_interval_minutes * 60
+
+    def __repr__(self):
+        return f"<FeedSource {self.name} {'enabled' if self.enabled else 'disabled'} weight={self.weight}>"
+
+
+def load_feed_registry(path: Path) -> list:
+    """Reads the enabled feeds from a registry file: a JSON list of FeedSource fields."""
+    path = Path(path)
+    sources = [FeedSource(**entry) for entry in json.loads(path.read_text(encoding="utf-8"))]
+    urls = [source.url for source in sources]
+    duplicates = {url for url in urls if urls.count(url) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate feeds in {path}: {', '.join(sorted(duplicates))}")
+    enabled = [source for source in sources if source.enabled]
+    logger.info(f"Loaded {len(enabled)} enabled feeds of {len(sources)} from {path}")
+    return enabled
@@ -0,0 +1,119 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    Calls `callback` on the event loop when any of the given files changes.
+    Uses inotify on the files' directories where available and falls back to
+    polling modification times. Bursts of events are debounced into one call.
+    """
+
+    def __init__(self, paths: list, callback, debounce: float = 0.5, poll_interval: float = 5.0):
+        self.paths = [Path(p) for p in paths]
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._loop = None
+        self._fd = None
+        self._poll_task = None
+        self._pending = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._start_inotify()
+            logger.info(f"Watching {[str(p) for p in self.paths]} with inotify")
+        except OSError as e:
+            logger.info(f"inotify is not available ({e}), polling {[str(p) for p in self.paths]} every {self.poll_interval}s")
+            self._poll_task = self._loop.create_task(self._poll())
+
+    def stop(self):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._poll_task:
+            self._poll_task.cancel()
+        if self._pending:
+            self._pending.cancel()
+
+    def _start_inotify(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("not Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for directory in {p.parent for p in self.paths}:
+            directory.mkdir(parents=True, exist_ok=True)
+            if libc.inotify_add_watch(fd, str(directory).encode(), WATCH_MASK) < 0:
+                errno = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        self._fd = fd
+        self._loop.add_reader(fd, self._on_inotify)
+
+    def _on_inotify(self):
+        names = {p.name for p in self.paths}
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        changed = False
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_len].rstrip(b"\0").decode(errors="replace")
+            offset += EVENT_HEADER.size + name_len
+            if name in names:
+                changed = True
+        if changed:
+            self._schedule_callback()
+
+    def _stat(self):
+        stats = []
+        for path in self.paths:
+            try:
+                st = path.stat()
+                stats.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return stats
+
+    async def _poll(self):
+        last = self._stat()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._stat()
+            if current != last:
+                last = current
+                self._schedule_callback()
+
+    def _schedule_callback(self):
+        if self._pending:
+            self._pending.cancel()
+        self._pending = self._loop.call_later(self.debounce, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        try:
+            self.callback()
+        except Exception as e:
+            logger.error(f"File change callback failed: {e}", exc_info=True)
@@ -0,0 +1,172 @@
+import io
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "image_index.json"
+POST_DIR_NAMES = ["future_posts", "posted_posts"]
+POST_IMAGE_NAME = "post_processed.png"
+
+# Two images whose hashes differ in at most this many of 64 bits are considered near-duplicates.
+DEFAULT_MAX_DISTANCE = 10
+
+
+def perceptual_hash(image_data: bytes, hash_size: int = 8) -> int:
+    """
+    Computes a 64-bit difference hash (dHash) of an image.
+    The image is shrunk to a (hash_size + 1) x hash_size grayscale thumbnail and every bit
+    tells whether a pixel is brighter than its right neighbour, so the hash survives
+    re-encoding, resizing and small colour changes.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_data)).convert("L")
+    image = image.resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Returns the Hamming distance between every hash in a uint64 array and a single hash."""
+    diff = np.bitwise_xor(hashes, np.uint64(value))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).astype(np.int64)
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class ImageIndex:
+    """
+    Perceptual hash index of the images of all drafted and posted posts.
+    Hashes are kept in a bit-packed uint64 NumPy array, so a lookup is a single
+    vectorised XOR + popcount over the whole index.
+    """
+
+    def __init__(self, index_path: Path, post_dirs: list):
+        self.index_path = Path(index_path)
+        self.post_dirs = [Path(post_dir) for post_dir in post_dirs]
+        self.lock = threading.Lock()
+        # path -> {"hash": int, "mtime": float}
+        self.entries = {}
+        self._paths = []
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            for path, entry in data.get("entries", {}).items():
+                self.entries[path] = {"hash": int(entry["hash"], 16), "mtime": entry["mtime"]}
+            self._rebuild()
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            logger.error(f"Could not read image index {self.index_path}, rebuilding it: {e}")
+            self.entries = {}
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"entries": {
+            path: {"hash": f"{entry['hash']:016x}", "mtime": entry["mtime"]}
+            for path, entry in self.entries.items()
+        }}
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+
+    def _rebuild(self):
+        self._paths = list(self.entries.keys())
+        self._hashes = np.array([self.entries[p]["hash"] for p in self._paths], dtype=np.uint64)
+
+    def _hash_file(self, image_path: Path):
+        self.entries[str(image_path)] = {
+            "hash": perceptual_hash(image_path.read_bytes()),
+            "mtime": image_path.stat().st_mtime,
+        }
+
+    def sync(self):
+        """
+        Brings the index up to date with the post directories.
+        Only new or modified images are hashed; entries of deleted posts are dropped.
+        """
+        with self.lock:
+            found = {}
+            for post_dir in self.post_dirs:
+                if post_dir.is_dir():
+                    for image_path in post_dir.glob(f"*/{POST_IMAGE_NAME}"):
+                        found[str(image_path)] = image_path
+
+            changed = False
+            for path in list(self.entries):
+                if path not in found:
+                    del self.entries[path]
+                    changed = True
+
+            for path, image_path in found.items():
+                entry = self.entries.get(path)
+                if entry is None or entry["mtime"] != image_path.stat().st_mtime:
+                    try:
+                        self._hash_file(image_path)
+                        changed = True
+                    except Exception as e:
+                        logger.error(f"Could not hash image {image_path}: {e}")
+
+            if changed:
+                self._rebuild()
+                self._save()
+                logger.info(f"Image index synced: {len(self.entries)} images.")
+
+    def add(self, image_path: Path):
+        """Adds (or refreshes) a single image in the index."""
+        image_path = Path(image_path)
+        with self.lock:
+            self._hash_file(image_path)
+            self._rebuild()
+            self._save()
+        logger.info(f"Added {image_path} to image index.")
+
+    def move(self, old_dir: Path, new_dir: Path):
+        """Re-points the entries of a post directory that was moved, without rehashing."""
+        old_prefix, new_prefix = str(Path(old_dir)), str(Path(new_dir))
+        with self.lock:
+            for path in list(self.entries):
+                if Path(path).parent == Path(old_prefix):
+                    self.entries[new_prefix + path[len(old_prefix):]] = self.entries.pop(path)
+            self._rebuild()
+            self._save()
+
+    def find_similar(self, image_data: bytes, max_distance: int = DEFAULT_MAX_DISTANCE) -> list:
+        """
+        Returns the indexed images within max_distance bits of the given image,
+        closest first, as a list of {"path": ..., "distance": ...}.
+        """
+        value = perceptual_hash(image_data)
+        with self.lock:
+            if not self._paths:
+                return []
+            distances = hamming_distances(self._hashes, value)
+            matches = np.flatnonzero(distances <= max_distance)
+            matches = matches[np.argsort(distances[matches], kind="stable")]
+            return [{"path": self._paths[i], "distance": int(distances[i])} for i in matches]
+
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def get_image_index() -> ImageIndex:
+    """Returns the current tenant's image index, synced with its post directories on first use."""
+    tenant = current_tenant()
+    with _index_lock:
+        if tenant.name not in _indexes:
+            index = ImageIndex(tenant.path(INDEX_FILE_NAME), [tenant.path(name) for name in POST_DIR_NAMES])
+            index.sync()
+            _indexes[tenant.name] = index
+    return _indexes[tenant.name]
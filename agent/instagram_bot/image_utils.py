@@ -1,26 +1,29 @@
 import io
+import json
 import logging
 import os
 import base64
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from time import sleep
-from PIL import Image, ImageOps
 import httpx
-from openai import OpenAI
-from .config import OPENAI_API_KEY
+from .media_cache import get_media_cache
+from .openai_client import get_client
+from .tenants import tenant_file
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 def describe_image_from_url(image_url: str, question: str = "What’s in this image?") -> str:
     """
     Describes an image from a URL using OpenAI's vision model.
     """
-    # Download image from URL
-    sleep(5)
-    response = httpx.get(image_url)
-    image_data = response.content
+    # Download image from URL, unless it is already cached
+    media_cache = get_media_cache()
+    image_path = media_cache.lookup(url=image_url)
+    if image_path is None:
+        sleep(5)
+        image_path = media_cache.fetch_url(image_url)
+    image_data = image_path.read_bytes()
 
     # Resize image to 320x320
     image_data = resize_image(image_data, 320, 320)
@@ -30,7 +33,7 @@ def describe_image_from_url(image_url: str, question: str = "What’s in this im
 
     try:
         logger.info(f"Describing image from URL: {image_url}")
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -53,11 +56,101 @@ def describe_image_from_url(image_url: str, question: str = "What’s in this im
         logger.error(f"Failed to describe image: {e}")
         raise
 
+def make_thumbnail(image_data: bytes, max_side: int = 320) -> bytes:
+    """
+    Shrinks an image to fit into a max_side square, keeping the aspect ratio.
+    Returns JPEG bytes, which are much smaller to send to the vision model than PNG.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_data))
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+def _download_thumbnail(http: httpx.Client, image_url: str) -> bytes:
+    image_path = get_media_cache().fetch_url(image_url, http=http)
+    return make_thumbnail(image_path.read_bytes())
+
+def _describe_batch(batch: list, question: str) -> dict:
+    """
+    Sends one vision request for a batch of (url, thumbnail) pairs.
+    Returns a dict of url -> description.
+    """
+    content = [{
+        "type": "text",
+        "text": (
+            f"You will get {len(batch)} images, each preceded by its number. "
+            f"For every image answer the question: {question}\n"
+            'Respond in JSON format: {"descriptions": [{"index": 1, "description": "..."}]}'
+        ),
+    }]
+    for index, (_, thumbnail) in enumerate(batch, start=1):
+        encoded_image = base64.b64encode(thumbnail).decode('utf-8')
+        content.append({"type": "text", "text": f"Image {index}:"})
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"},
+        })
+
+    response = get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": content}],
+        response_format={"type": "json_object"},
+        max_tokens=300 * len(batch),
+    )
+    result = json.loads(response.choices[0].message.content)
+
+    descriptions = {}
+    for entry in result.get("descriptions", []):
+        index = entry.get("index")
+        if isinstance(index, int) and 1 <= index <= len(batch):
+            descriptions[batch[index - 1][0]] = entry.get("description", "")
+    return descriptions
+
+def describe_images_from_urls(image_urls: list, question: str = "What’s in this image?", batch_size: int = 5, max_workers: int = 8) -> dict:
+    """
+    Describes several images from URLs using OpenAI's vision model.
+    Images are downloaded and thumbnailed concurrently and sent in batches of
+    `batch_size` images per request. Returns a dict of url -> description;
+    images that could not be downloaded or described are left out.
+    """
+    image_urls = list(dict.fromkeys(image_urls))
+    if not image_urls:
+        return {}
+
+    logger.info(f"Describing {len(image_urls)} images in batches of {batch_size}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with httpx.Client(follow_redirects=True, timeout=30) as http:
+            futures = {url: executor.submit(_download_thumbnail, http, url) for url in image_urls}
+            thumbnails = []
+            for url, future in futures.items():
+                try:
+                    thumbnails.append((url, future.result()))
+                except Exception as e:
+                    logger.error(f"Failed to download image {url}: {e}")
+
+        batches = [thumbnails[i:i + batch_size] for i in range(0, len(thumbnails), batch_size)]
+        descriptions = {}
+        for future in [executor.submit(_describe_batch, batch, question) for batch in batches]:
+            try:
+                descriptions.update(future.result())
+            except Exception as e:
+                logger.error(f"Failed to describe image batch: {e}")
+
+    logger.info(f"Described {len(descriptions)} of {len(image_urls)} images")
+    return descriptions
+
 def resize_image(image_data: bytes, width: int, height: int) -> bytes:
     """
     Resizes an image to the given width and height.
     Returns bytes in PNG, JPEG, GIF or WebP format.
     """
+    from PIL import Image
+
     image = Image.open(io.BytesIO(image_data))
     image = image.resize((width, height), Image.Resampling.LANCZOS)
     output = io.BytesIO()
@@ -70,10 +163,47 @@ def resize_image(image_data: bytes, width: int, height: int) -> bytes:
     image.save(output, format=format)
     return output.getvalue()
 
+def prepare_upload_image(image_data: bytes, quality: int = 95) -> bytes:
+    """
+    Encodes an image the way a feed photo upload needs it: cropped to Instagram's allowed
+    aspect ratios, at most 1080x1350, RGB on a white background, as JPEG without metadata.
+    Raises ValueError if the image cannot be decoded or is smaller than Instagram accepts.
+    """
+    from instagrapi.image_util import calc_crop, calc_resize
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"Could not decode image: {e}") from e
+    if image.width < 320 or image.height < 167:
+        raise ValueError(f"Image is {image.width}x{image.height}, smaller than the 320x167 minimum")
+    # Apply the EXIF orientation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+
+    crop_box = calc_crop((4.0 / 5.0, 90.0 / 47.0), image.size)
+    if crop_box:
+        image = image.crop(crop_box)
+    new_size = calc_resize((1080, 1350), image.size)
+    if new_size:
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    if image.mode != "RGB":
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, (0, 0), image)
+        image = background
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
 def image_preprocessing(image_data: bytes) -> bytes:
     """
     Adds a border and a logo to the image.
     """
+    from PIL import Image, ImageOps
+
     try:
         logger.info("Starting image preprocessing...")
         
@@ -81,7 +211,7 @@ def image_preprocessing(image_data: bytes) -> bytes:
         image = Image.open(io.BytesIO(image_data))
 
         # Add logo
-        logo_path = "logo.png" 
+        logo_path = tenant_file("logo.png", Path("logo.png"))
         if os.path.exists(logo_path):
             logo = Image.open(logo_path)
             
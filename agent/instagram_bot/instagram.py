@@ -1,43 +1,92 @@
+import hashlib
+import json
 import logging
 import os
-import tempfile
 from pathlib import Path
-from instagrapi import Client
-from instagrapi.exceptions import LoginRequired
-from instagrapi.types import StoryMedia #, StoryPoll
-from instagrapi.story import StoryBuilder
-from .config import INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD
+from typing import TYPE_CHECKING
+from .tenants import current_tenant, data_path, tenant_file
+from .media_cache import get_media_cache
 import re
+import threading
 import time
+from datetime import datetime, timezone
 from time import sleep
 
+# instagrapi (and the numpy/PIL based helpers) are imported on first use, not at startup
+if TYPE_CHECKING:
+    from instagrapi import Client
+
 logger = logging.getLogger(__name__)
 
+UPLOAD_IMAGE_NAME = "post_upload.jpg"
+UPLOAD_CHECKSUM_NAME = "post_upload.json"
+MAX_CAPTION_LENGTH = 2200
+MAX_HASHTAGS = 30
+# A reused session is checked again before use if it has been idle for longer than this
+SESSION_MAX_AGE = 30 * 60
+
+# Warm clients per tenant name: (client, last checked at)
+_clients = {}
+_client_locks = {}
+_client_locks_lock = threading.Lock()
+
 def get_instagram_client():
-    """Initializes and returns an authenticated instagrapi client."""
-    logger.info(f"Attempting to log in as {INSTAGRAM_USERNAME}")
+    """Initializes and returns an authenticated instagrapi client for the current tenant."""
+    tenant = current_tenant()
+    username, password = tenant.instagram_username, tenant.instagram_password
+    logger.info(f"Attempting to log in as {username}")
+    from instagrapi import Client
+    from instagrapi.exceptions import LoginRequired
+
     cl = Client()
     
-    session_file = Path(f"{INSTAGRAM_USERNAME}.json")
+    session_file = tenant.session_file
     if session_file.exists():
         cl.load_settings(session_file)
         logger.info(f"Loaded session from {session_file}")
     
+    session_file.parent.mkdir(parents=True, exist_ok=True)
     try:
-        cl.login(INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD)
+        cl.login(username, password)
         cl.dump_settings(session_file)
-        logger.info(f"Logged in as {INSTAGRAM_USERNAME} and saved session.")
+        logger.info(f"Logged in as {username} and saved session.")
     except LoginRequired:
         logger.warning("Login required. Could not use session file.")
-        cl.login(INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD)
+        cl.login(username, password)
         cl.dump_settings(session_file)
-        logger.info(f"Logged in as {INSTAGRAM_USERNAME} and saved session.")
+        logger.info(f"Logged in as {username} and saved session.")
     return cl
 
+def get_warm_client(validate: bool = False) -> "Client":
+    """
+    Returns a logged-in client that is kept between calls, so a publish at its due time
+    does not have to log in first. The session is checked with a light request when
+    `validate` is set or it was last checked more than SESSION_MAX_AGE ago, and the client
+    logs in again if the check fails. Each tenant has its own client.
+    """
+    tenant = current_tenant()
+    with _client_locks_lock:
+        lock = _client_locks.setdefault(tenant.name, threading.Lock())
+    with lock:
+        client, checked_at = _clients.get(tenant.name, (None, 0.0))
+        if client is not None:
+            if not validate and time.time() - checked_at < SESSION_MAX_AGE:
+                return client
+            try:
+                client.account_info()
+                _clients[tenant.name] = (client, time.time())
+                return client
+            except Exception as e:
+                logger.warning(f"Cached Instagram session of {tenant.name} is not usable, logging in again: {e}")
+        client = get_instagram_client()
+        _clients[tenant.name] = (client, time.time())
+        return client
+
+
 def get_instagram_posts():
     """Fetches all media from the Instagram profile."""
     cl = get_instagram_client()
-    user_id = cl.user_id_from_username(INSTAGRAM_USERNAME)
+    user_id = cl.user_id_from_username(current_tenant().instagram_username)
     logger.info(f"Fetching posts for user ID {user_id}")
     
     medias = cl.user_medias(user_id, 10)
@@ -55,11 +104,11 @@ def get_instagram_posts():
 
 def sync_instagram_posts():
     """
-    Fetches Instagram posts and appends new ones to data/post_history.md.
+    Fetches Instagram posts and appends new ones to the tenant's post_history.md.
     Only performs full sync if file hasn't been synced in last 10 minutes.
     """
     logger.info("Starting Instagram post sync.")
-    post_history_path = "data/post_history.md"
+    post_history_path = data_path("post_history.md")
     
     # Ensure the history file exists
     if not os.path.exists(post_history_path):
@@ -104,55 +153,171 @@ def sync_instagram_posts():
     # File is automatically touched by the write operation above
 
 
-def make_post(post_directory_name: str):
-    """
-    Posts an image with a caption to Instagram from a given directory.
-    Moves the post to 'posted_posts' upon success.
-    """
-    logger.info(f"Attempting to make a post from directory: {post_directory_name}")
-    
-    future_post_dir = Path(f"data/future_posts/{post_directory_name}")
-    
+def _post_files(post_directory_name: str):
+    """Returns the directory, image and caption paths of a drafted post, raising FileNotFoundError if any is missing."""
+    future_post_dir = data_path("future_posts", post_directory_name)
+
     if not future_post_dir.is_dir():
         error_message = f"Directory {future_post_dir} does not exist."
         logger.error(error_message)
         raise FileNotFoundError(error_message)
-        
+
     image_path = future_post_dir / "post_processed.png"
     caption_path = future_post_dir / "post.txt"
-    
+
     if not image_path.exists():
         error_message = f"Image file not found at {image_path}"
         logger.error(error_message)
         raise FileNotFoundError(error_message)
-        
+
     if not caption_path.exists():
         error_message = f"Caption file not found at {caption_path}"
         logger.error(error_message)
         raise FileNotFoundError(error_message)
-        
+
+    return future_post_dir, image_path, caption_path
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _replace_atomically(path: Path, data: bytes):
+    """Writes `path` through a temporary file of its own, unique per process and thread."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def prepare_upload_asset(post_dir: Path) -> Path:
+    """
+    Encodes the upload-ready JPEG of a draft next to its processed PNG and records the
+    checksums of both in post_upload.json. The checksum file is written last, so a
+    half-written asset is never used.
+    """
+    from .image_utils import prepare_upload_image
+
+    post_dir = Path(post_dir)
+    image_path = post_dir / "post_processed.png"
+    upload_path = post_dir / UPLOAD_IMAGE_NAME
+    checksum_path = post_dir / UPLOAD_CHECKSUM_NAME
+
+    image_data = image_path.read_bytes()
+    upload_data = prepare_upload_image(image_data)
+    _replace_atomically(upload_path, upload_data)
+
+    checksums = {
+        "sha256": hashlib.sha256(upload_data).hexdigest(),
+        "source_sha256": hashlib.sha256(image_data).hexdigest(),
+        "bytes": len(upload_data),
+    }
+    _replace_atomically(checksum_path, json.dumps(checksums).encode())
+    logger.info(f"Prepared upload asset {upload_path} ({len(upload_data)} bytes)")
+    return upload_path
+
+
+def _upload_image_path(future_post_dir: Path, image_path: Path) -> Path:
+    """
+    The upload-ready JPEG if its checksums show it is intact and was made from the current
+    processed image, otherwise the PNG itself.
+    """
+    upload_path = future_post_dir / UPLOAD_IMAGE_NAME
+    checksum_path = future_post_dir / UPLOAD_CHECKSUM_NAME
+    if not upload_path.exists() or not checksum_path.exists():
+        return image_path
+    try:
+        checksums = json.loads(checksum_path.read_text())
+        if checksums["sha256"] == _sha256(upload_path) and checksums["source_sha256"] == _sha256(image_path):
+            return upload_path
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Unreadable upload checksums in {checksum_path}: {e}")
+        return image_path
+    logger.warning(f"Upload asset in {future_post_dir} is stale or corrupt, falling back to {image_path.name}")
+    return image_path
+
+
+def preflight_post(post_directory_name: str) -> Path:
+    """
+    Prepares a scheduled post ahead of its publish time: checks the draft files and caption,
+    encodes the upload JPEG next to the processed image and makes sure the Instagram session
+    works. Raises on any problem. Returns the path of the upload image.
+    """
+    future_post_dir, image_path, caption_path = _post_files(post_directory_name)
+
+    caption = caption_path.read_text(encoding="utf-8")
+    if not caption.strip():
+        raise ValueError(f"Caption in {caption_path} is empty")
+    if len(caption) > MAX_CAPTION_LENGTH:
+        raise ValueError(f"Caption in {caption_path} is {len(caption)} characters long, the limit is {MAX_CAPTION_LENGTH}")
+    hashtags = re.findall(r"#\w+", caption)
+    if len(hashtags) > MAX_HASHTAGS:
+        raise ValueError(f"Caption in {caption_path} has {len(hashtags)} hashtags, the limit is {MAX_HASHTAGS}")
+
+    upload_path = future_post_dir / UPLOAD_IMAGE_NAME
+    if _upload_image_path(future_post_dir, image_path) != upload_path:
+        prepare_upload_asset(future_post_dir)
+
+    get_warm_client(validate=True)
+    logger.info(f"Pre-flight for post {post_directory_name} passed")
+    return upload_path
+
+
+def upload_post(post_directory_name: str):
+    """
+    Uploads a drafted post to Instagram and returns the media. Does not move the draft:
+    publishing goes through the publish queue, which records the upload before moving.
+    Uses the upload JPEG and the session prepared by preflight_post when they are available.
+    """
+    logger.info(f"Attempting to make a post from directory: {post_directory_name}")
+
+    future_post_dir, image_path, caption_path = _post_files(post_directory_name)
+
     with open(caption_path, "r") as f:
         caption = f.read()
-        
-    cl = get_instagram_client()
-    
-    logger.info(f"Uploading photo from {image_path} with caption.")
+
+    cl = get_warm_client()
+    upload_path = _upload_image_path(future_post_dir, image_path)
+
+    logger.info(f"Uploading photo from {upload_path} with caption.")
+    media = cl.photo_upload(upload_path, caption)
+    logger.info(f"Post successfully uploaded. Shortcode: {media.code}")
+    return media
+
+
+def move_to_posted(post_directory_name: str) -> Path:
+    """Moves a published draft to 'posted_posts'. Does nothing if it was moved already."""
+    future_post_dir = data_path("future_posts", post_directory_name)
+    posted_dir = data_path("posted_posts")
+    new_location = posted_dir / post_directory_name
+    if not future_post_dir.exists() and new_location.exists():
+        return new_location
+
+    posted_dir.mkdir(parents=True, exist_ok=True)
+    future_post_dir.rename(new_location)
+    logger.info(f"Moved post directory from {future_post_dir} to {new_location}")
     try:
-        media = cl.photo_upload(image_path, caption)
-        logger.info(f"Post successfully uploaded. Shortcode: {media.code}")
-        
-        # Move the post to a 'posted' directory
-        posted_dir = Path("data/posted_posts")
-        posted_dir.mkdir(exist_ok=True)
-        
-        new_location = posted_dir / post_directory_name
-        future_post_dir.rename(new_location)
-        logger.info(f"Moved post directory from {future_post_dir} to {new_location}")
-        return media
-        
+        from .image_index import get_image_index
+        get_image_index().move(future_post_dir, new_location)
     except Exception as e:
-        logger.error(f"Failed to upload post: {e}", exc_info=True)
-        raise
+        logger.error(f"Failed to update image index for {new_location}: {e}", exc_info=True)
+    return new_location
+
+
+def find_recent_post(caption: str, since: datetime, amount: int = 5):
+    """
+    Returns our own post with the given caption published at or after `since`, or None.
+    Used to find out whether an upload that was interrupted went through after all.
+    """
+    cl = get_warm_client()
+    for media in cl.user_medias(cl.user_id, amount):
+        taken_at = media.taken_at if media.taken_at.tzinfo else media.taken_at.replace(tzinfo=timezone.utc)
+        if taken_at >= since and (media.caption_text or "").strip() == caption.strip():
+            return media
+    return None
+
 
 def search_posts_by_hashtag(hashtag: str, amount: int = 5):
     """
@@ -166,11 +331,14 @@ def search_posts_by_hashtag(hashtag: str, amount: int = 5):
     logger.info(f"Found {len(medias)} posts with hashtag: {hashtag}")
 
     posts = []
+    media_cache = get_media_cache()
     for media in medias:
         image_url = next((str(resource.thumbnail_url) for resource in media.resources if resource.thumbnail_url), None)
         if image_url is None:
             logger.warning(f"No image URL found for post {media.code}")
             continue
+        # A later describe or repost of this post then reuses one download
+        media_cache.register(media.pk, image_url)
         posts.append({
             "shortcode": str(media.code),
             "caption": str(media.caption_text),
@@ -184,28 +352,71 @@ def search_posts_by_hashtag(hashtag: str, amount: int = 5):
     return posts
 
 
+def download_media(media_pk, cl: "Client" = None) -> Path:
+    """
+    Returns the local path of a photo (or the first photo of an album) through the media cache.
+    Only media that was not seen in search results needs a media_info lookup.
+    """
+    media_cache = get_media_cache()
+    media_path = media_cache.lookup(media_pk=media_pk)
+    if media_path is not None:
+        return media_path
+
+    url = media_cache.url_for(media_pk)
+    if url is None:
+        cl = cl or get_instagram_client()
+        media = cl.media_info(media_pk)
+        if media.media_type == 1:
+            url = media.thumbnail_url
+        elif media.media_type == 8 and media.resources:
+            url = media.resources[0].thumbnail_url  # Get first photo from album
+        else:
+            raise ValueError(f"Media {media_pk} is neither a photo nor an album")
+    return media_cache.fetch_url(str(url), media_pk=media_pk)
+
+
+def prepare_story_repost(post_url: str, caption: str = "", cl: "Client" = None) -> Path:
+    """
+    Downloads the media of a post and renders the story clip for it.
+    Returns the path to the rendered clip. The clip is cached by (media_pk, caption, background),
+    so preparing the same story again, or publishing a prepared one, does not render it twice.
+    """
+    from instagrapi import Client
+    from . import story
+
+    media_pk = (cl or Client()).media_pk_from_url(post_url)
+    background = tenant_file("background1.png")
+    clip_path = story.cached_story_path(media_pk, caption, background)
+    if clip_path.exists():
+        logger.info(f"Using cached story clip {clip_path} for media {media_pk}")
+        return clip_path
+
+    pending = story.pending_story_clip(media_pk, caption, background)
+    if pending is not None:
+        logger.info(f"Waiting for story clip of media {media_pk} that is being rendered")
+        return Path(pending.result())
+
+    media_path = download_media(media_pk, cl=cl)
+    return Path(story.submit_story_clip(media_pk, media_path, caption, background).result())
+
+
 def post_story_repost_photo(post_url: str, caption: str = ""):
     """
     Reposts a photo from a given URL.
+    Uses the clip rendered by prepare_story_repost if there is one.
     """
+    from instagrapi.types import StoryMedia
+
     cl = get_instagram_client()
     media_pk = cl.media_pk_from_url(post_url)
-    try:
-        media_path = cl.photo_download(media_pk)
-    except AssertionError:
-        media_path = cl.album_download(media_pk)[0]  # Get first photo from album
-    
-    buildout = StoryBuilder(
-        media_path,
-        caption,
-        bgpath=Path('data/background1.png')
-    ).photo(15)
+    clip_path = prepare_story_repost(post_url, caption, cl=cl)
 
     cl.video_upload_to_story(
-        buildout.path, 
+        clip_path,
         caption=caption,
         medias=[StoryMedia(media_pk=media_pk, x=0.5, y=0.5, width=0.6, height=0.8)]
     )
+    clip_path.unlink(missing_ok=True)
     return True
 
 
@@ -0,0 +1,86 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    Durable record of scheduled jobs, keyed by the stable task id.
+    Keeps each job's next run time, last run and result, and marks one-shot jobs
+    (those that returned CancelJob) as completed so they are never run again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    task_name TEXT NOT NULL,
+                    task_args TEXT NOT NULL,
+                    schedule TEXT NOT NULL,
+                    next_run TEXT,
+                    last_run TEXT,
+                    last_result TEXT,
+                    completed_at TEXT
+                )
+                """
+            )
+
+    def get(self, job_id: str):
+        """Returns the stored record of a job as a dict with datetimes parsed, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        for field in ("next_run", "last_run", "completed_at"):
+            if record[field]:
+                record[field] = datetime.fromisoformat(record[field])
+        return record
+
+    def save_job(self, job):
+        """Inserts a job or updates its next run time."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO jobs (id, task_name, task_args, schedule, next_run)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET next_run = excluded.next_run
+                """,
+                (
+                    job.id,
+                    job.task_name,
+                    json.dumps(job.task_args, ensure_ascii=False),
+                    json.dumps(job.schedule_info, ensure_ascii=False),
+                    job.next_run.isoformat() if job.next_run else None,
+                ),
+            )
+
+    def record_run(self, job):
+        """Stores the outcome of the last run of a job."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET last_run = ?, last_result = ? WHERE id = ?",
+                (job.last_run.isoformat() if job.last_run else None, job.last_result, job.id),
+            )
+
+    def mark_completed(self, job_id: str, when: datetime):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET completed_at = ? WHERE id = ?", (when.isoformat(), job_id))
+
+    def is_completed(self, job_id: str) -> bool:
+        with self.lock:
+            row = self.conn.execute("SELECT completed_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["completed_at"])
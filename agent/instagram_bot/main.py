@@ -1,35 +1,68 @@
+import time
+
+_STARTED = time.perf_counter()
+
+import importlib
 import logging
 import os
-import threading
 import signal
 import sys
-from .telegram_bot import run_bot
-from .scheduler import run_scheduler
+
+# Bot modules in import order; each one's time includes the dependencies it imports first
+STARTUP_MODULES = ["config", "tenants", "publish_queue", "agentic_flow", "news_monitor", "telegram_bot", "scheduler"]
+# Slow-to-import dependencies that are only needed once a task uses them
+LAZY_DEPENDENCIES = ["openai", "instagrapi", "moviepy", "numpy", "PIL", "feedparser", "requests"]
+
 
 def handle_sigint(signum, frame):
     logging.info("Received SIGINT (Ctrl+C). Shutting down...")
     sys.exit(0)
 
 
+def import_startup_modules() -> list:
+    """Imports the bot's modules one by one and returns (module, seconds) pairs."""
+    timings = []
+    for name in STARTUP_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(f".{name}", __package__)
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def log_startup_timing(timings: list):
+    """Logs where startup time went, like a condensed `python -X importtime`."""
+    total = sum(seconds for _, seconds in timings)
+    breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings)
+    logging.info(f"Imported bot modules in {total * 1000:.0f} ms: {breakdown}")
+    loaded = [name for name in LAZY_DEPENDENCIES if name in sys.modules]
+    if loaded:
+        logging.warning(f"Imported at startup although only needed on first use: {', '.join(loaded)}")
+
+
 def main():
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
-    
-    logging.info("Creating 'data/future_posts' directory if it doesn't exist...")
-    os.makedirs("data/future_posts", exist_ok=True)
+    log_startup_timing(import_startup_modules())
+
+    from .scheduler import start_scheduler
+    from .telegram_bot import run_bot
+    from .tenants import TENANTS
+
+    for tenant in TENANTS.values():
+        logging.info(f"Creating '{tenant.path('future_posts')}' directory if it doesn't exist...")
+        os.makedirs(tenant.path("future_posts"), exist_ok=True)
 
     # Register SIGINT handler
     signal.signal(signal.SIGINT, handle_sigint)
 
-    logging.info("Starting scheduler in a background thread...")
-    scheduler_thread = threading.Thread(target=run_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
+    async def on_startup(application):
+        await start_scheduler(application)
+        logging.info(f"Bot ready {time.perf_counter() - _STARTED:.2f}s after start")
 
-    logging.info("Starting bot...")
-    run_bot()
+    logging.info("Starting bot, the scheduler runs on the bot's event loop...")
+    run_bot(on_startup=on_startup)
     logging.info("Bot stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DIR = Path("data/media_cache")
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_MB", "200")) * 1024 * 1024
+MAX_REGISTERED_URLS = 1000
+# Query parameters of Instagram CDN URLs that change between fetches of the same asset
+VOLATILE_PARAMS = ("oh", "oe")
+VOLATILE_PARAM_PREFIXES = ("_nc_",)
+
+
+def url_key(url: str) -> str:
+    """
+    Instagram CDN URLs carry signatures and expiry timestamps in the query string, so the same
+    asset is identified without them. Other parameters, e.g. size variants (`stp`) or an id
+    that selects the resource, are kept.
+    """
+    parsed = urlparse(str(url))
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name not in VOLATILE_PARAMS and not name.startswith(VOLATILE_PARAM_PREFIXES)
+    )
+    return f"{parsed.netloc}{parsed.path}" + (f"?{urlencode(query)}" if query else "")
+
+
+class MediaCache:
+    """
+    Local cache of downloaded remote media.
+    Files are stored by content hash; media pks and URLs are aliases pointing to a hash,
+    so the same asset reached via a post and via its thumbnail URL is stored once.
+    The least recently used files are evicted when the cache grows over max_bytes.
+    """
+
+    def __init__(self, cache_dir: Path = MEDIA_CACHE_DIR, max_bytes: int = MEDIA_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.index_path = self.cache_dir / "index.json"
+        self.lock = threading.Lock()
+        # content hash -> {"file": ..., "size": ..., "last_access": ...}
+        self.files = {}
+        # media pk -> content hash
+        self.by_pk = {}
+        # url key -> content hash
+        self.by_url = {}
+        # media pk -> url, for media seen in search results but not downloaded yet
+        self.pk_urls = {}
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self.files = data.get("files", {})
+            self.by_pk = data.get("by_pk", {})
+            self.by_url = data.get("by_url", {})
+            self.pk_urls = data.get("pk_urls", {})
+        except json.JSONDecodeError as e:
+            logger.error(f"Could not read media cache index {self.index_path}, starting empty: {e}")
+        # Drop entries whose files were removed behind our back
+        for digest in [d for d, entry in self.files.items() if not (self.cache_dir / entry["file"]).exists()]:
+            self._forget(digest)
+
+    def _save(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = {"files": self.files, "by_pk": self.by_pk, "by_url": self.by_url, "pk_urls": self.pk_urls}
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+
+    def _forget(self, digest: str):
+        self.files.pop(digest, None)
+        self.by_pk = {pk: d for pk, d in self.by_pk.items() if d != digest}
+        self.by_url = {key: d for key, d in self.by_url.items() if d != digest}
+
+    def _touch(self, digest: str) -> Path:
+        entry = self.files[digest]
+        entry["last_access"] = time.time()
+        return self.cache_dir / entry["file"]
+
+    def _evict(self, keep: str = None):
+        total = sum(entry["size"] for entry in self.files.values())
+        for digest, entry in sorted(self.files.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            (self.cache_dir / entry["file"]).unlink(missing_ok=True)
+            total -= entry["size"]
+            self._forget(digest)
+            logger.info(f"Evicted {entry['file']} from media cache")
+
+    def lookup(self, media_pk=None, url: str = None):
+        """Returns the cached file for a media pk or URL, or None."""
+        with self.lock:
+            digest = None
+            if media_pk is not None:
+                digest = self.by_pk.get(str(media_pk))
+            if digest is None and url:
+                digest = self.by_url.get(url_key(url))
+            if digest is None or digest not in self.files:
+                return None
+            path = self._touch(digest)
+            # The index is only written when a new alias is learned, not on every hit
+            changed = False
+            if media_pk is not None and self.by_pk.get(str(media_pk)) != digest:
+                self.by_pk[str(media_pk)] = digest
+                changed = True
+            if url and self.by_url.get(url_key(url)) != digest:
+                self.by_url[url_key(url)] = digest
+                changed = True
+            if changed:
+                self._save()
+            return path
+
+    def register(self, media_pk, url: str):
+        """Remembers the URL of a media without downloading it, so a later fetch by pk needs no lookup."""
+        with self.lock:
+            self.pk_urls.pop(str(media_pk), None)
+            self.pk_urls[str(media_pk)] = str(url)
+            while len(self.pk_urls) > MAX_REGISTERED_URLS:
+                self.pk_urls.pop(next(iter(self.pk_urls)))
+            digest = self.by_url.get(url_key(url))
+            if digest:
+                self.by_pk[str(media_pk)] = digest
+            self._save()
+
+    def url_for(self, media_pk):
+        with self.lock:
+            return self.pk_urls.get(str(media_pk))
+
+    def put(self, data: bytes, media_pk=None, url: str = None) -> Path:
+        """Stores downloaded bytes and links them to the given media pk and URL."""
+        digest = hashlib.sha256(data).hexdigest()
+        suffix = Path(urlparse(str(url)).path).suffix.lower() if url else ""
+        with self.lock:
+            if digest not in self.files:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                file_name = f"{digest[:32]}{suffix or '.bin'}"
+                tmp_path = self.cache_dir / f"{file_name}.tmp"
+                tmp_path.write_bytes(data)
+                tmp_path.replace(self.cache_dir / file_name)
+                self.files[digest] = {"file": file_name, "size": len(data), "last_access": time.time()}
+            if media_pk is not None:
+                self.by_pk[str(media_pk)] = digest
+            if url:
+                self.by_url[url_key(url)] = digest
+            path = self._touch(digest)
+            self._evict(keep=digest)
+            self._save()
+            return path
+
+    def fetch_url(self, url: str, media_pk=None, http: httpx.Client = None) -> Path:
+        """Returns the cached file for a URL, downloading it first if needed."""
+        path = self.lookup(media_pk=media_pk, url=url)
+        if path is not None:
+            return path
+        logger.info(f"Downloading media {url_key(url)} into cache")
+        response = (http or httpx).get(str(url), follow_redirects=True, timeout=30)
+        response.raise_for_status()
+        return self.put(response.content, media_pk=media_pk, url=url)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MediaCache()
+    return _cache
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from collections import Counter
+
+import numpy as np
+
+from .news_prefilter import item_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+NUM_HASHES = 128
+# Estimated Jaccard similarity of word-stem sets above which two items report the same event
+SIMILARITY_THRESHOLD = 0.3
+# Shorter than the pre-filter's stems: reworded reports of one event differ mostly in word endings
+STEM_LENGTH = 4
+# Stems found in more than this share of the documents are treated as stop words
+COMMON_STEM_SHARE = 0.1
+# With fewer documents a share says little (three reports of one event are a large share of a
+# small batch), so no stems are dropped
+MIN_STOP_WORD_DOCUMENTS = 30
+_PRIME = 4294967291  # largest prime below 2**32
+
+_rng = np.random.default_rng(20240824)
+_A = _rng.integers(1, _PRIME, NUM_HASHES, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_HASHES, dtype=np.uint64)
+
+
+def shingles(texts: list, reference_texts: list = ()) -> list:
+    """
+    Word-stem sets of texts; stems rather than words so differently inflected reports still overlap.
+    Stems common across the texts and `reference_texts` (e.g. recent news) are dropped, so that
+    generic words do not chain unrelated items together.
+    """
+    sets = [set(tokenize(text, STEM_LENGTH)) for text in texts]
+    documents = sets + [set(tokenize(text, STEM_LENGTH)) for text in reference_texts]
+    if len(documents) < MIN_STOP_WORD_DOCUMENTS:
+        return sets
+    frequency = Counter(stem for stems in documents for stem in stems)
+    limit = COMMON_STEM_SHARE * len(documents)
+    return [{stem for stem in stems if frequency[stem] <= limit} for stems in sets]
+
+
+def minhash_signature(tokens: set) -> np.ndarray:
+    """MinHash signature of a set of tokens. Token hashes are 32-bit, so a*x+b fits in uint64."""
+    if not tokens:
+        return np.full(NUM_HASHES, _PRIME, dtype=np.uint64)
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "big") for token in tokens],
+        dtype=np.uint64,
+    )
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def cluster_items(items: list, threshold: float = SIMILARITY_THRESHOLD, reference_items: list = ()) -> list:
+    """
+    Groups near-duplicate news items by the MinHash estimate of the Jaccard similarity of
+    their title and summary stems. Returns clusters as lists of item indexes, in item order.
+    `reference_items`, other recent news, only count towards the stop-word frequencies.
+    """
+    if not items:
+        return []
+    stem_sets = shingles([item_text(item) for item in items], [item_text(item) for item in reference_items])
+    signatures = np.stack([minhash_signature(stems) for stems in stem_sets])
+    empty = signatures[:, 0] == _PRIME
+
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(items) - 1):
+        if empty[i]:
+            continue
+        similarity = (signatures[i + 1:] == signatures[i]).mean(axis=1)
+        for offset in np.flatnonzero((similarity >= threshold) & ~empty[i + 1:]):
+            a, b = find(i), find(i + 1 + int(offset))
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    clusters = {}
+    for i in range(len(items)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
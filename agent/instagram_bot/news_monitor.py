@@ -1,226 +1,332 @@
-import feedparser
-import requests
 import logging
-from datetime import datetime, date
-from typing import List, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Literal
 import asyncio
-from openai import OpenAI
-from .config import OPENAI_API_KEY
+from pydantic import BaseModel
+from .feed_fetcher import get_feed_fetcher
+from .feed_registry import FEEDS_FILE_NAME, load_feed_registry
+from .news_store import NewsStore, content_hash, get_news_store, news_key
+from .openai_client import get_client
+from .posting_gate import get_posting_gate
+from .tenants import TENANTS, tenant_file, use_tenant
+from .ukraine_calendar import MEMORIAL, days_on
 
 logger = logging.getLogger(__name__)
 
+# Classification batches are sized by estimated prompt tokens rather than item count
+CLASSIFY_CHUNK_TOKENS = 3000
+CLASSIFY_MAX_CHUNK_ITEMS = 40
+CLASSIFY_CONCURRENCY = 4
+# Rough average for Ukrainian news text; no tokenizer is needed for batch sizing
+CHARS_PER_TOKEN = 3
+
+
+class NewsVerdict(BaseModel):
+    id: str
+    category: Literal["STRESSFUL", "LIGHTWEIGHT"]
+    reason: str
+
+
+class NewsClassification(BaseModel):
+    analysis: List[NewsVerdict]
+
+
+class ContentFit(BaseModel):
+    id: str
+    fits_content: bool
+    story_idea: str
+    reason: str
+
+
+class ContentFitAnalysis(BaseModel):
+    recommendations: List[ContentFit]
+
+
+def _reports_note(item: Dict[str, Any]) -> str:
+    sources = item.get('source_count', 1)
+    return f" (reported by {sources} sources)" if sources > 1 else ""
+
+
+def _news_line(item_id: str, item: Dict[str, Any]) -> str:
+    return f"- [{item_id}] *{item['when']}* - {item['title']}{_reports_note(item)}: {item.get('summary', '')}"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_by_tokens(lines: List[str], max_tokens: int = CLASSIFY_CHUNK_TOKENS,
+                    max_items: int = CLASSIFY_MAX_CHUNK_ITEMS) -> List[List[int]]:
+    """Groups line indexes into chunks of at most `max_tokens` estimated tokens and `max_items` lines."""
+    chunks, current, current_tokens = [], [], 0
+    for i, line in enumerate(lines):
+        tokens = estimate_tokens(line)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class NewsMonitor:
-    def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.feeds = [
-            "https://www.rbc.ua/static/rss/ukrnet.strong.ukr.rss.xml",
-            # "https://www.liga.net/newsua/top/rss.xml",
-            # "https://nv.ua/ukr/rss/2365.xml",
-            "https://www.5.ua/dv/rss",
-        ]
+    def __init__(self, store: NewsStore = None, feeds: list = None):
+        self.store = store or get_news_store()
+        self._prefilter = None
+        self.feeds = feeds if feeds is not None else load_feed_registry(tenant_file(FEEDS_FILE_NAME))
     
-    def get_ukraine_holidays(self) -> List[Dict[str, Any]]:
-        """Get public holidays in Ukraine for today"""
-        try:
-            today =  date.today()
-            # Using a public holidays API - this is a placeholder, you may need to find a suitable API
-            # For now, we'll return empty list and focus on RSS feeds
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching Ukraine holidays: {e}")
-            return []
+    def get_ukraine_holidays(self, day: date = None) -> List[Dict[str, Any]]:
+        """Ukrainian public holidays, memorial days and observances on a day (today by default), from the offline calendar"""
+        return days_on(day or date.today())
     
-    def get_rss_news(self, feed_url: str) -> List[Dict[str, Any]]:
-        """Fetch and parse RSS feed"""
-        try:
-            feed = feedparser.parse(feed_url)
-            news_items = []
-            
-            today = date.today()
-            yesterday = today.replace(day=today.day-1)
-            
-            for entry in feed.entries:
-                # Parse publication date
-                pub_date = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    pub_date = date(*entry.published_parsed[:3])
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    pub_date = date(*entry.updated_parsed[:3])
-                
-                # Filter today's and yesterday's news
-                if pub_date and (pub_date == today or pub_date == yesterday):
-                    news_items.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'summary': getattr(entry, 'summary', ''),
-                        'published': entry.get('published', ''),
-                        'source': feed_url,
-                        'when': 'today' if pub_date == today else 'yesterday'
-                    })
-                
-            return news_items
-        except Exception as e:
-            logger.error(f"Error fetching RSS from {feed_url}: {e}")
-            return []
+    def get_rss_news(self, feed_url: str, entries: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Today's and yesterday's items of an RSS feed (fetched now unless `entries` are given)"""
+        if entries is None:
+            try:
+                entries = get_feed_fetcher().fetch(feed_url)
+            except Exception as e:
+                logger.error(f"Error fetching RSS from {feed_url}: {e}")
+                return []
+
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        news_items = []
+        for entry in entries:
+            pub_date = date.fromisoformat(entry['date'])
+            # Filter today's and yesterday's news
+            if pub_date == today or pub_date == yesterday:
+                news_items.append({
+                    'title': entry['title'],
+                    'link': entry['link'],
+                    'summary': entry['summary'],
+                    'published': entry['published'],
+                    'source': feed_url,
+                    'when': 'today' if pub_date == today else 'yesterday'
+                })
+        return news_items
     
-    def collect_all_news(self) -> List[Dict[str, Any]]:
-        """Collect news from all sources"""
+    def collect_all_news(self, force: bool = False) -> List[Dict[str, Any]]:
+        """Collect news from all sources; only feeds due for a poll are fetched unless `force` is set"""
         all_news = []
         
-        # Get holidays
-        holidays = self.get_ukraine_holidays()
-        all_news.extend(holidays)
-        
-        # Get RSS feeds
-        for feed_url in self.feeds:
-            rss_news = self.get_rss_news(feed_url)
-            all_news.extend(rss_news)
+        # Get RSS feeds, all at once; unchanged feeds come from the feed cache
+        for feed_url, entries in get_feed_fetcher().fetch_all(self.feeds, force=force).items():
+            all_news.extend(self.get_rss_news(feed_url, entries))
         
-        print(all_news)
         logger.info(f"Collected {len(all_news)} news items for today")
         return all_news
     
+    def cluster_news(self, news_items: List[Dict[str, Any]], analyses: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Groups reports of the same event from different feeds and returns one representative
+        per group, preferring one that is already categorized. The representative carries its
+        `duplicates`, the number of reports as `cluster_size` and of distinct feeds as `source_count`.
+        """
+        from .news_clusters import cluster_items
+
+        # Recent news from earlier runs tells generic words from an event's own words in a small batch
+        keys = {item['key'] for item in news_items}
+        reference_items = [item for item in self.store.recent_items() if item['key'] not in keys]
+        representatives = []
+        for cluster in cluster_items(news_items, reference_items=reference_items):
+            members = [news_items[i] for i in cluster]
+            representative = next((item for item in members if item['key'] in analyses), members[0])
+            representative['duplicates'] = [item for item in members if item is not representative]
+            representative['cluster_size'] = len(members)
+            representative['source_count'] = len({item['source'] for item in members})
+            representatives.append(representative)
+        logger.info(f"Grouped {len(news_items)} news items into {len(representatives)} events")
+        return representatives
+
     def categorize_news(self, news_items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        """Categorize news using OpenAI nano model"""
+        """
+        Categorize news using OpenAI nano model. Near-duplicate reports are categorized once, through
+        one representative per event, and items categorized on an earlier run reuse their stored verdict.
+        Only representatives are returned.
+        """
+        return self.classify_events(*self.dedupe_news(news_items))
+
+    def dedupe_news(self, news_items: List[Dict[str, Any]]) -> tuple:
+        """
+        Records the items as seen and groups reports of the same event. Returns the representatives
+        of the events and the stored category analyses of the items, by item key.
+        """
         if not news_items:
-            return {'stressful': [], 'lightweight': [], 'unrelated': []}
+            return [], {}
+        for item in news_items:
+            item['key'] = news_key(item)
+        self.store.record_seen(news_items)
+        analyses = self.store.categories([item['key'] for item in news_items])
+        return self.cluster_news(news_items, analyses), analyses
+
+    def classify_events(self, representatives: List[Dict[str, Any]], analyses: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Categorizes the events without a stored analysis and groups all events by category"""
+        categorized = {'stressful': [], 'lightweight': [], 'unrelated': []}
+        new_items = list({item['key']: item for item in representatives if item['key'] not in analyses}.values())
+        logger.info(f"Categorizing {len(new_items)} new events, {len(representatives) - len(new_items)} already categorized")
+
+        if new_items:
+            candidates, discarded = self.prefilter().split(new_items)
+            if discarded:
+                logger.info(f"Pre-filter discarded {len(discarded)} of {len(new_items)} new news items as unrelated")
+                discarded_analyses = {
+                    item['key']: {'title': item['title'], 'category': 'UNRELATED', 'reason': 'Local pre-filter', 'when': item['when']}
+                    for item in discarded
+                }
+                self.store.save_categories(discarded_analyses, classified_by="prefilter")
+                analyses.update(discarded_analyses)
+            try:
+                new_analyses = self._classify_news(candidates) if candidates else {}
+                self.store.save_categories(new_analyses)
+                analyses.update(new_analyses)
+            except Exception as e:
+                logger.error(f"Error categorizing news: {e}")
+
+        # Other reports of an event share its verdict; they are not used to train the pre-filter
+        inherited = {
+            duplicate['key']: analyses[item['key']]
+            for item in representatives if item['key'] in analyses
+            for duplicate in item['duplicates'] if duplicate['key'] not in analyses
+        }
+        self.store.save_categories(inherited, classified_by="cluster")
+
+        # Group news by category
+        for item in representatives:
+            analysis = analyses.get(item['key'])
+            if analysis:
+                category = analysis['category'].lower()
+                if category in categorized:
+                    item['analysis'] = analysis
+                    categorized[category].append(item)
+        return categorized
+
+    def reset_prefilter(self):
+        """Makes the next use of the pre-filter train it again, on the verdicts stored so far."""
+        self._prefilter = None
+
+    def prefilter(self):
+        """The local pre-filter, trained on the stored model verdicts on first use."""
+        if self._prefilter is None:
+            # numpy is only imported when there is something to classify
+            from .news_prefilter import NewsPrefilter, format_report
+
+            self._prefilter = NewsPrefilter.train(self.store.labeled_items())
+            logger.info(format_report(self._prefilter.report))
+        return self._prefilter
+
+    def _classify_news(self, news_items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Sends items to the model in concurrent batches and returns their analyses by item key.
+        Items carry ids that the structured response echoes back; items the model leaves out are unrelated.
+        A batch that fails is skipped, so its items are classified again on the next run.
+        """
+        lines = [_news_line(str(i), item) for i, item in enumerate(news_items)]
+        chunks = chunk_by_tokens(lines)
+        logger.info(f"Classifying {len(news_items)} news items in {len(chunks)} batches")
+
+        analyses = {}
+        with ThreadPoolExecutor(max_workers=CLASSIFY_CONCURRENCY) as executor:
+            futures = {
+                executor.submit(self._classify_chunk, "\n".join(lines[i] for i in chunk)): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    verdicts = {verdict.id: verdict for verdict in future.result()}
+                except Exception as e:
+                    logger.error(f"Error categorizing a batch of {len(chunk)} news items: {e}")
+                    continue
+                for i in chunk:
+                    item = news_items[i]
+                    verdict = verdicts.get(str(i))
+                    analyses[item['key']] = {
+                        'title': item['title'],
+                        'category': verdict.category if verdict else 'UNRELATED',
+                        'reason': verdict.reason if verdict else '',
+                        'when': item['when'],
+                    }
+        return analyses
+
+    def _classify_chunk(self, news_text: str) -> List[NewsVerdict]:
+        prompt = f"""
+        Analyze the following news and categorize each item:
+
+        {news_text}
+
+        Categorize each news item as:
+        1. STRESSFUL - war-related, tragic, disasters, people are in grief, national tragedy. It should impact a lot of people and make them feel bad, other news should be categorized as UNRELATED.
+        2. LIGHTWEIGHT - viral social media content, memes, funny quotes or videos, entertainment news, sports highlights, positive community events, cultural phenomena - content that brings joy, laughter or positive emotions and has significant social media engagement. Other news should be categorized as UNRELATED.
+        3. UNRELATED - other unrelated news (most of the news should be categorized as UNRELATED)
+
+        Stressful event indicators:
+        - Mass casualties or major loss of life
+        - National tragedies or disasters
+        - Deaths of prominent public figures
+        - Major terrorist attacks
+        - Catastrophic events affecting many people
         
-        try:
-            chunk_size = 10
-            news_chunks = [news_items[i:i + chunk_size] for i in range(0, len(news_items), chunk_size)]
-            
-            all_analysis = []
-            
-            for chunk in news_chunks:
-                # Prepare news text for analysis
-                news_text = "\n".join([f"- *{item['when']}* - {item['title']}: {item.get('summary', '')}" for item in chunk])
-                
-                prompt = f"""
-                Analyze the following news and categorize each item:
-
-                {news_text}
-
-                Categorize each news item as:
-                1. STRESSFUL - war-related, tragic, disasters, people are in grief, national tragedy. It should impact a lot of people and make them feel bad, other news should be categorized as UNRELATED.
-                2. LIGHTWEIGHT - viral social media content, memes, funny quotes or videos, entertainment news, sports highlights, positive community events, cultural phenomena - content that brings joy, laughter or positive emotions and has significant social media engagement. Other news should be categorized as UNRELATED.
-                3. UNRELATED - other unrelated news (most of the news should be categorized as UNRELATED)
-
-                Stressful event indicators:
-                - Mass casualties or major loss of life
-                - National tragedies or disasters
-                - Deaths of prominent public figures
-                - Major terrorist attacks
-                - Catastrophic events affecting many people
-                
-                Not a stressful event indicators:
-                - Some drone attacks
-                - Some natural disasters
-                - Economic issues or market fluctuations
-                - Minor incidents or accidents
-                - Ongoing war developments (if not major new casualties)
-                - Business or administrative issues
-
-                Lightweigt news indicators:
-                - Humor
-                - Entertainment
-                - Sports
-                - Positive community events
-                - Culture
-                - It should be really impactful, funny or important.
-
-                Don't include unrelated news in the response.
-
-                Respond in JSON format:
-                {{
-                    "analysis": [
-                        {{"title": "news title", "category": "STRESSFUL/LIGHTWEIGHT", "reason": "brief explanation", "when": "today/yesterday"}}
-                    ]
-                }}
-                """
-                
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",  # nano model
-                    messages=[{"role": "user", "content": prompt}],
-                    response_format={"type": "json_object"},
-                    temperature=0.3
-                )
-                
-                import json
-                print(response.choices[0].message.content)
-                chunk_analysis = json.loads(response.choices[0].message.content)
-                all_analysis.extend(chunk_analysis['analysis'])
-            
-            # Group news by category
-            categorized = {'stressful': [], 'lightweight': [], 'unrelated': []}
-            
-            for i, item in enumerate(news_items):
-                if i < len(all_analysis):
-                    category = all_analysis[i]['category'].lower()
-                    if category in categorized:
-                        item['analysis'] = all_analysis[i]
-                        categorized[category].append(item)
-            
-            return categorized
-            
-        except Exception as e:
-            logger.error(f"Error categorizing news: {e}")
-            return {'stressful': [], 'lightweight': [], 'unrelated': []}
-    
+        Not a stressful event indicators:
+        - Some drone attacks
+        - Some natural disasters
+        - Economic issues or market fluctuations
+        - Minor incidents or accidents
+        - Ongoing war developments (if not major new casualties)
+        - Business or administrative issues
+
+        Lightweigt news indicators:
+        - Humor
+        - Entertainment
+        - Sports
+        - Positive community events
+        - Culture
+        - It should be really impactful, funny or important.
+
+        Don't include unrelated news in the response.
+
+        Each news item starts with its id in square brackets. Respond with one entry per STRESSFUL or
+        LIGHTWEIGHT item: its id exactly as given, its category and a brief explanation.
+        """
+
+        response = get_client().chat.completions.parse(
+            model="gpt-4o-mini",  # nano model
+            messages=[{"role": "user", "content": prompt}],
+            response_format=NewsClassification,
+            temperature=0.3
+        )
+        return response.choices[0].message.parsed.analysis
+
     def analyze_content_fit(self, lightweight_news: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze if lightweight news fits content plan"""
+        """Analyze if lightweight news fits content plan. Items already judged against the same plan are not sent again."""
         if not lightweight_news:
             return []
         
         try:
             # Read content plan
-            with open('data/content_plan.md', 'r', encoding='utf-8') as f:
+            with open(tenant_file('content_plan.md'), 'r', encoding='utf-8') as f:
                 content_plan = f.read()
-            
-            news_text = "\n".join([f"- {item['title']}: {item.get('summary', '')}" for item in lightweight_news])
-            
-            prompt = f"""
-            Content Plan:
-            {content_plan}
-            
-            Lightweight News:
-            {news_text}
-            
-            For each news item, analyze if it fits our Instagram content strategy and could be used for a story.
-            Consider: brand alignment, audience interest, storytelling potential.
-            It should be a really impactful news, that will be interesting for our audience. Other news should be ignored with fits_content = false.
-            
-            Respond in JSON format:
-            {{
-                "recommendations": [
-                    {{
-                        "title": "news title",
-                        "fits_content": true/false,
-                        "story_idea": "specific story concept if applicable",
-                        "reason": "why it fits or doesn't fit"
-                    }}
-                ]
-            }}
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                temperature=0.4
-            )
-            
-            import json
-            print(response.choices[0].message.content)
-            recommendations = json.loads(response.choices[0].message.content)
+            plan_hash = content_hash(content_plan)
+
+            for item in lightweight_news:
+                item.setdefault('key', news_key(item))
+            recommendations = self.store.content_fits([item['key'] for item in lightweight_news], plan_hash)
+            new_items = list({item['key']: item for item in lightweight_news if item['key'] not in recommendations}.values())
+            if new_items:
+                new_recommendations = self._recommend_content(new_items, content_plan)
+                self.store.save_content_fits(new_recommendations, plan_hash)
+                recommendations.update(new_recommendations)
             
             # Filter only news that fits content plan
             fitting_news = []
-            for i, item in enumerate(lightweight_news):
-                if i < len(recommendations['recommendations']):
-                    rec = recommendations['recommendations'][i]
-                    if rec.get('fits_content', False):
-                        item['recommendation'] = rec
-                        fitting_news.append(item)
+            for item in lightweight_news:
+                rec = recommendations.get(item['key'])
+                if rec and rec.get('fits_content', False):
+                    item['recommendation'] = rec
+                    fitting_news.append(item)
             
             return fitting_news
             
@@ -228,8 +334,53 @@ class NewsMonitor:
             logger.error(f"Error analyzing content fit: {e}")
             return []
 
+    def _recommend_content(self, lightweight_news: List[Dict[str, Any]], content_plan: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Asks the model which items fit the content plan and returns its recommendations by item key.
+        Items carry ids that the structured response echoes back; items the model leaves out do not fit.
+        """
+        news_text = "\n".join([f"- [{i}] {item['title']}: {item.get('summary', '')}" for i, item in enumerate(lightweight_news)])
+        
+        prompt = f"""
+        Content Plan:
+        {content_plan}
+        
+        Lightweight News:
+        {news_text}
+        
+        For each news item, analyze if it fits our Instagram content strategy and could be used for a story.
+        Consider: brand alignment, audience interest, storytelling potential.
+        It should be a really impactful news, that will be interesting for our audience. Other news should be ignored with fits_content = false.
+        
+        Each news item starts with its id in square brackets. Respond with one entry per item: its id
+        exactly as given, whether it fits the content plan, a specific story concept if applicable
+        and why it fits or doesn't fit.
+        """
+        
+        response = get_client().chat.completions.parse(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            response_format=ContentFitAnalysis,
+            temperature=0.4
+        )
+        
+        fits = {fit.id: fit for fit in response.choices[0].message.parsed.recommendations}
+        recommendations = {}
+        for i, item in enumerate(lightweight_news):
+            fit = fits.get(str(i))
+            recommendations[item['key']] = {
+                'title': item['title'],
+                'fits_content': fit.fits_content if fit else False,
+                'story_idea': fit.story_idea if fit else '',
+                'reason': fit.reason if fit else 'Not in the model response',
+            }
+        return recommendations
+
     def analyze_mourning_day(self, stressful_news: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze if stressful news indicates a mourning day that requires refraining from posting"""
+        """
+        Analyze if stressful news indicates a mourning day that requires refraining from posting.
+        The analysis is stored per set of stressful items, so an unchanged set is not analyzed again.
+        """
         if not stressful_news:
             return {
                 'is_mourning_day': False,
@@ -237,15 +388,26 @@ class NewsMonitor:
                 'recommendation': 'safe_to_post',
                 'details': 'No concerning events detected'
             }
+
+        memorial_days = [entry['name'] for entry in self.get_ukraine_holidays() if entry['kind'] == MEMORIAL]
+        # 'when' is part of the key: an event moving from today to yesterday can change the verdict
+        verdict_key = "mourning:" + content_hash("\n".join(sorted(
+            f"{item.get('key') or news_key(item)}|{item['when']}" for item in stressful_news
+        ) + memorial_days))
+        cached = self.store.verdict(verdict_key)
+        if cached is not None:
+            logger.info(f"Reusing mourning day analysis of the same {len(stressful_news)} stressful news items")
+            return cached
         
         try:
             # Prepare news text for analysis
-            news_text = "\n".join([f"- *{item['when']}* - {item['title']}: {item.get('summary', '')}" for item in stressful_news])
+            news_text = "\n".join([f"- *{item['when']}* - {item['title']}{_reports_note(item)}: {item.get('summary', '')}" for item in stressful_news])
             
             prompt = f"""
             Analyze the following stressful news to determine if today should be treated as a mourning day:
 
             {news_text}
+            {"Today is also a memorial day: " + "; ".join(memorial_days) + ". Weigh the news with this in mind." if memorial_days else ""}
 
             Determine if this is a MOURNING DAY (people are in grief, national tragedy) or just REGULAR STRESSFUL NEWS (life goes on).
             Consider that it's an ongoing war, so it's not a mourning day if there are some drone attacks, rocket strikes and even some casualties.
@@ -280,7 +442,7 @@ class NewsMonitor:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},
@@ -289,6 +451,7 @@ class NewsMonitor:
             
             import json
             analysis = json.loads(response.choices[0].message.content)
+            self.store.save_verdict(verdict_key, analysis)
             
             return analysis
             
@@ -302,81 +465,259 @@ class NewsMonitor:
                 'key_events': []
             }
 
-async def news_monitoring_task(reply_message, reply_photo):
-    """Main news monitoring task"""
+class StageTimer:
+    """Wall-clock time of each stage of a pipeline run; concurrent stages overlap."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    async def run(self, name: str, func, *args):
+        """Runs a blocking stage in a worker thread and records how long it took."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self.stages[name] = time.perf_counter() - started
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stages.items())
+        return f"{stages}; total {time.perf_counter() - self.started:.2f}s"
+
+
+def watched_feeds(tenant_names: list) -> list:
+    """The feeds of all the given tenants, each feed once."""
+    feeds = {}
+    for tenant_name in tenant_names:
+        with use_tenant(tenant_name):
+            for feed in load_feed_registry(tenant_file(FEEDS_FILE_NAME)):
+                feeds.setdefault(feed.url, feed)
+    return list(feeds.values())
+
+
+class NewsWatcher:
+    """
+    Continuous news monitoring. Polls the feeds every `interval` seconds (an unchanged feed costs
+    one 304 response), runs only items not seen before through classification, and alerts the
+    admin as soon as the news amounts to a mourning day rather than at the next scheduled
+    news_monitoring run. New content opportunities are reported once each.
+    One watcher serves all tenants, since they share the news store and the feed cache: it
+    polls the feeds of every tenant, and sets each tenant's posting gate, alerts each tenant's
+    admin and judges content fit against each tenant's content plan.
+    """
+
+    def __init__(self, reply_message, interval: float, tenant_names: list = None, monitor: NewsMonitor = None):
+        self.reply_message = reply_message
+        self.interval = interval
+        self.tenant_names = list(tenant_names or TENANTS)
+        self.monitor = monitor or NewsMonitor(feeds=watched_feeds(self.tenant_names))
+        # Stressful events covered by the last mourning alert, and content ideas already reported
+        self._mourning_events = set()
+        self._reported_content = set()
+        self._day = None
+
+    async def run(self):
+        logger.info(f"Watching news every {self.interval:.0f}s for {len(self.tenant_names)} tenant(s)")
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"News watch poll failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        """One polling round; returns the number of new items."""
+        if self._day != date.today():
+            self._day = date.today()
+            self._mourning_events.clear()
+            self._reported_content.clear()
+            await asyncio.to_thread(self.monitor.store.prune)
+            # Retrained daily on the verdicts stored since the last training
+            self.monitor.reset_prefilter()
+
+        timer = StageTimer()
+        news_items = await timer.run("fetch", self.monitor.collect_all_news)
+        if not news_items:
+            return 0
+        seen = await asyncio.to_thread(self.monitor.store.seen, [news_key(item) for item in news_items])
+        new_count = sum(news_key(item) not in seen for item in news_items)
+        if not new_count:
+            return 0
+        logger.info(f"News watch: {new_count} new items")
+
+        representatives, analyses = await timer.run("dedupe", self.monitor.dedupe_news, news_items)
+        categorized = await timer.run("classify", self.monitor.classify_events, representatives, analyses)
+        await asyncio.gather(
+            self._check_mourning(categorized['stressful'], timer),
+            self._report_content(categorized['lightweight'], timer),
+        )
+        logger.info(f"News watch poll: {timer.summary()}")
+        return new_count
+
+    async def _check_mourning(self, stressful: List[Dict[str, Any]], timer: StageTimer):
+        stressful_keys = {item['key'] for item in stressful}
+        if not stressful or stressful_keys <= self._mourning_events:
+            return
+        mourning_analysis = await timer.run("mourning", self.monitor.analyze_mourning_day, stressful)
+        for tenant_name in self.tenant_names:
+            with use_tenant(tenant_name):
+                await asyncio.to_thread(get_posting_gate().set_news_verdict, mourning_analysis)
+                if mourning_analysis.get('is_mourning_day'):
+                    await self.reply_message(format_stressful_message(stressful, mourning_analysis))
+        if mourning_analysis.get('is_mourning_day'):
+            self._mourning_events = stressful_keys
+
+    async def _report_content(self, lightweight: List[Dict[str, Any]], timer: StageTimer):
+        new_lightweight = [item for item in lightweight if item['key'] not in self._reported_content]
+        if not new_lightweight:
+            return
+        await asyncio.gather(*(self._report_tenant_content(name, new_lightweight, timer) for name in self.tenant_names))
+        self._reported_content.update(item['key'] for item in new_lightweight)
+
+    async def _report_tenant_content(self, tenant_name: str, lightweight: List[Dict[str, Any]], timer: StageTimer):
+        # Each tenant has its own content plan
+        stage = "content_fit" if len(self.tenant_names) == 1 else f"content_fit:{tenant_name}"
+        with use_tenant(tenant_name):
+            fitting_news = await timer.run(stage, self.monitor.analyze_content_fit, [dict(item) for item in lightweight])
+            if fitting_news:
+                await self.reply_message(format_content_message(fitting_news))
+
+
+def format_stressful_message(stressful_news: List[Dict[str, Any]], mourning_analysis: Dict[str, Any]) -> str:
+    """Admin message about stressful news and whether to refrain from posting"""
+    stressful_count = len(stressful_news)
+    # Events reported by more feeds first
+    stressful_events = sorted(
+        stressful_news, key=lambda item: (item.get('source_count', 1), item.get('cluster_size', 1)), reverse=True
+    )
+    stressful_titles = [
+        item['title'] + (f" (джерел: {item['source_count']})" if item.get('source_count', 1) > 1 else "")
+        for item in stressful_events[:3]  # Show max 3
+    ]
+    
+    if mourning_analysis['is_mourning_day']:
+        # Mourning day - refrain from posting
+        message = f"🖤 **ДЕНЬ ЖАЛОБИ** ({stressful_count} подій)\n\n"
+        for title in stressful_titles:
+            message += f"• {title}\n"
+        
+        if stressful_count > 3:
+            message += f"• ... та ще {stressful_count - 3} подій\n"
+        
+        message += f"\n📋 **Аналіз:** {mourning_analysis['reason']}\n\n"
+        message += "🚫 **РЕКОМЕНДАЦІЯ: УТРИМАТИСЬ ВІД ПУБЛІКАЦІЙ**\n"
+        message += "• Заплановані пости відкладаються автоматично (/posting_gate open, щоб публікувати)\n"
+        message += f"• {mourning_analysis['details']}"
+        
+        if mourning_analysis.get('key_events'):
+            message += f"\n\n🔍 **Ключові події:**\n"
+            for event in mourning_analysis['key_events'][:3]:
+                message += f"• {event}\n"
+    else:
+        # Regular stressful news - life goes on
+        message = f"⚠️ **СТРЕСОВІ НОВИНИ** ({stressful_count} подій)\n\n"
+        for title in stressful_titles:
+            message += f"• {title}\n"
+        
+        if stressful_count > 3:
+            message += f"• ... та ще {stressful_count - 3} подій\n"
+        
+        message += f"\n📋 **Аналіз:** {mourning_analysis['reason']}\n\n"
+        message += "✅ **РЕКОМЕНДАЦІЯ: МОЖНА ПУБЛІКУВАТИ**\n"
+        message += "• Життя триває, можна публікувати контент\n"
+        message += f"• {mourning_analysis['details']}"
+
+        if mourning_analysis.get('key_events'):
+            message += f"\n\n🔍 **Ключові події:**\n"
+            for event in mourning_analysis['key_events'][:3]:
+                message += f"• {event}\n"
+    
+    return message
+
+
+def format_content_message(fitting_news: List[Dict[str, Any]]) -> str:
+    """Admin message listing news that fit the content plan"""
+    message = f"💡 **МОЖЛИВОСТІ ДЛЯ КОНТЕНТУ** ({len(fitting_news)} ідей)\n\n"
+    
+    for item in fitting_news:
+        rec = item.get('recommendation', {})
+        message += f"📰 **{item['title']}**\n"
+        message += f"💭 Ідея: {rec.get('story_idea', 'Не вказано')}\n"
+        message += f"🔗 {item.get('link', '')}\n\n"
+    
+    return message
+
+
+def format_calendar_message(calendar_days: List[Dict[str, Any]]) -> str:
+    """Admin message about today's holidays and memorial days"""
+    message = "📅 **СЬОГОДНІ**\n\n"
+    for entry in calendar_days:
+        message += f"{'🕯' if entry['kind'] == MEMORIAL else '•'} {entry['name']}\n"
+    if any(entry['kind'] == MEMORIAL for entry in calendar_days):
+        message += "\nДень пам'яті: стриманий тон публікацій, без розважального контенту"
+    return message
+
+
+async def run_news_pipeline(monitor: NewsMonitor, force: bool = False) -> Dict[str, Any]:
+    """
+    One pass of the news pipeline as async stages, each stage's blocking work in a worker thread.
+    Stages that do not depend on each other run concurrently: pruning the store and training the
+    pre-filter while the feeds are fetched, and the mourning day and content fit analyses once the
+    news is classified. Dedupe needs every feed's items and classification needs the events, so
+    those run in turn; feeds and classification batches are still fetched and sent concurrently.
+    """
+    timer = StageTimer()
+    news_items, _, _ = await asyncio.gather(
+        timer.run("fetch", monitor.collect_all_news, force),
+        timer.run("prune", monitor.store.prune),
+        timer.run("prefilter", monitor.prefilter),
+    )
+    representatives, analyses = await timer.run("dedupe", monitor.dedupe_news, news_items)
+    categorized = await timer.run("classify", monitor.classify_events, representatives, analyses)
+
+    mourning_analysis, fitting_news = await asyncio.gather(
+        timer.run("mourning", monitor.analyze_mourning_day, categorized['stressful']),
+        timer.run("content_fit", monitor.analyze_content_fit, categorized['lightweight']),
+    )
+    # Scheduled posts check the verdict before uploading
+    await asyncio.to_thread(get_posting_gate().set_news_verdict, mourning_analysis)
+    return {
+        'news_count': len(news_items),
+        'categorized': categorized,
+        'mourning_analysis': mourning_analysis,
+        'fitting_news': fitting_news,
+        'timings': timer.summary(),
+    }
+
+
+async def news_monitoring_task(reply_message, reply_photo) -> str:
+    """Main news monitoring task. Returns the per-stage timing of the run."""
     logger.info("Starting news monitoring task...")
     
     monitor = NewsMonitor()
+
+    calendar_days = monitor.get_ukraine_holidays()
+    if calendar_days:
+        await reply_message(format_calendar_message(calendar_days))
     
-    # Collect news
-    news_items = monitor.collect_all_news()
-    
-    if not news_items:
-        logger.info("No news items found for today")
-        return
+    # Poll every feed regardless of its interval
+    result = await run_news_pipeline(monitor, force=True)
+    categorized = result['categorized']
     
-    # Categorize news
-    categorized = monitor.categorize_news(news_items)
+    if not result['news_count']:
+        logger.info(f"No news items found for today ({result['timings']})")
+        return result['timings']
     
     # Handle stressful news
     if categorized['stressful']:
-        # Analyze if this is a mourning day
-        mourning_analysis = monitor.analyze_mourning_day(categorized['stressful'])
-        
-        stressful_count = len(categorized['stressful'])
-        stressful_titles = [item['title'] for item in categorized['stressful'][:3]]  # Show max 3
-        
-        if mourning_analysis['is_mourning_day']:
-            # Mourning day - refrain from posting
-            message = f"🖤 **ДЕНЬ ЖАЛОБИ** ({stressful_count} подій)\n\n"
-            for title in stressful_titles:
-                message += f"• {title}\n"
-            
-            if stressful_count > 3:
-                message += f"• ... та ще {stressful_count - 3} подій\n"
-            
-            message += f"\n📋 **Аналіз:** {mourning_analysis['reason']}\n\n"
-            message += "🚫 **РЕКОМЕНДАЦІЯ: УТРИМАТИСЬ ВІД ПУБЛІКАЦІЙ**\n"
-            message += "• Відкладіть заплановані пости на інший день\n"
-            message += f"• {mourning_analysis['details']}"
-            
-            if mourning_analysis.get('key_events'):
-                message += f"\n\n🔍 **Ключові події:**\n"
-                for event in mourning_analysis['key_events'][:3]:
-                    message += f"• {event}\n"
-        else:
-            # Regular stressful news - life goes on
-            message = f"⚠️ **СТРЕСОВІ НОВИНИ** ({stressful_count} подій)\n\n"
-            for title in stressful_titles:
-                message += f"• {title}\n"
-            
-            if stressful_count > 3:
-                message += f"• ... та ще {stressful_count - 3} подій\n"
-            
-            message += f"\n📋 **Аналіз:** {mourning_analysis['reason']}\n\n"
-            message += "✅ **РЕКОМЕНДАЦІЯ: МОЖНА ПУБЛІКУВАТИ**\n"
-            message += "• Життя триває, можна публікувати контент\n"
-            message += f"• {mourning_analysis['details']}"
-
-            if mourning_analysis.get('key_events'):
-                message += f"\n\n🔍 **Ключові події:**\n"
-                for event in mourning_analysis['key_events'][:3]:
-                    message += f"• {event}\n"
-        
-        await reply_message(message)
+        await reply_message(format_stressful_message(categorized['stressful'], result['mourning_analysis']))
     
     # Handle lightweight news that fits content plan
-    fitting_news = monitor.analyze_content_fit(categorized['lightweight'])
-    
-    if fitting_news:
-        message = f"💡 **МОЖЛИВОСТІ ДЛЯ КОНТЕНТУ** ({len(fitting_news)} ідей)\n\n"
-        
-        for item in fitting_news:
-            rec = item.get('recommendation', {})
-            message += f"📰 **{item['title']}**\n"
-            message += f"💭 Ідея: {rec.get('story_idea', 'Не вказано')}\n"
-            message += f"🔗 {item.get('link', '')}\n\n"
-        
-        await reply_message(message)
+    if result['fitting_news']:
+        await reply_message(format_content_message(result['fitting_news']))
     
-    logger.info(f"News monitoring completed: {len(categorized['stressful'])} stressful, {len(fitting_news)} content opportunities")
+    logger.info(
+        f"News monitoring completed: {len(categorized['stressful'])} stressful, "
+        f"{len(result['fitting_news'])} content opportunities ({result['timings']})"
+    )
+    return result['timings']
@@ -0,0 +1,200 @@
+"""
+Local first stage of news classification.
+
+Most news items are UNRELATED, so before items go to the model a cheap classifier drops the
+ones it is confident about: an item is forwarded if it mentions any word from the lexicon of
+stressful and lightweight topics, or if a TF-IDF + logistic regression model trained on the
+model's stored verdicts gives it a non-negligible chance of being relevant. The discard
+threshold is chosen on held-out verdicts so that (almost) no relevant item is dropped; with
+too few verdicts to train on, every item is forwarded.
+
+    python -m instagram_bot.news_prefilter    # precision/recall against the stored verdicts
+"""
+import hashlib
+import logging
+import re
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Word stems that always send an item to the model (compared against word prefixes)
+RELEVANT_STEMS = (
+    # Stressful
+    "загин", "загибл", "жертв", "трау", "жалоб", "теракт", "катастроф", "трагед", "помер", "смерт",
+    "вбит", "вбив", "постражд", "поранен", "масован", "обстріл", "зруйнов", "евакуац", "рятувальн",
+    "killed", "dead", "death", "victim", "mourn", "tragedy", "disaster", "attack",
+    # Lightweight
+    "мем", "вірусн", "смішн", "гумор", "жарт", "тікток", "тренд", "футбол", "збірн", "олімп",
+    "чемпіон", "перемог", "фестивал", "концерт", "євробач", "прем'єр", "фільм", "серіал",
+    "viral", "meme", "funny", "champion", "festival", "eurovision",
+)
+MIN_TRAINING_ITEMS = 200
+MIN_RELEVANT_ITEMS = 20
+# Share of held-out relevant items that must still be forwarded
+TARGET_RECALL = 0.98
+# Items are only discarded below this probability, however the threshold comes out
+MAX_DISCARD_PROBABILITY = 0.2
+HOLDOUT_SHARE = 5  # every 5th item, by key hash
+STEM_LENGTH = 6
+MAX_FEATURES = 5000
+
+WORD_RE = re.compile(r"[\w']+", re.UNICODE)
+
+
+def tokenize(text: str, stem_length: int = STEM_LENGTH) -> list:
+    """Lowercased words cut to `stem_length` characters, a crude stemmer for Ukrainian inflections."""
+    return [word[:stem_length] for word in WORD_RE.findall(text.lower()) if len(word) > 2 and not word.isdigit()]
+
+
+def item_text(item: dict) -> str:
+    return f"{item.get('title', '')} {item.get('summary') or ''}"
+
+
+def has_relevant_keyword(text: str) -> bool:
+    return any(word.startswith(RELEVANT_STEMS) for word in WORD_RE.findall(text.lower()))
+
+
+def _is_holdout(key: str) -> bool:
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest(), 16) % HOLDOUT_SHARE == 0
+
+
+class TfidfLogisticModel:
+    """TF-IDF over word stems with an L2-regularized, class-balanced logistic regression."""
+
+    def __init__(self, max_features: int = MAX_FEATURES, min_df: int = 2):
+        self.max_features = max_features
+        self.min_df = min_df
+        self.vocabulary = {}
+        self.idf = None
+        self.weights = None
+        self.bias = 0.0
+
+    def _vectorize(self, texts: list) -> np.ndarray:
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in Counter(tokenize(text)).items():
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    matrix[row, column] = count
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def fit(self, texts: list, labels: list, epochs: int = 300, learning_rate: float = 2.0, l2: float = 1e-3):
+        document_frequency = Counter(token for text in texts for token in set(tokenize(text)))
+        tokens = [token for token, df in document_frequency.most_common(self.max_features) if df >= self.min_df]
+        self.vocabulary = {token: i for i, token in enumerate(tokens)}
+        df = np.array([document_frequency[token] for token in tokens], dtype=np.float32)
+        self.idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+        x = self._vectorize(texts)
+        y = np.asarray(labels, dtype=np.float32)
+        # Relevant items are rare; weight both classes equally
+        positives = max(y.sum(), 1.0)
+        sample_weights = np.where(y == 1, len(y) / (2 * positives), len(y) / (2 * max(len(y) - positives, 1.0)))
+        self.weights = np.zeros(x.shape[1], dtype=np.float32)
+        self.bias = 0.0
+        for _ in range(epochs):
+            error = (self._sigmoid(x @ self.weights + self.bias) - y) * sample_weights
+            self.weights -= learning_rate * (x.T @ error / len(y) + l2 * self.weights)
+            self.bias -= learning_rate * float(error.mean())
+        return self
+
+    @staticmethod
+    def _sigmoid(z: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+    def predict_proba(self, texts: list) -> np.ndarray:
+        return self._sigmoid(self._vectorize(texts) @ self.weights + self.bias)
+
+
+def _scores(forwarded: list, relevant: list) -> dict:
+    true_positives = sum(f and r for f, r in zip(forwarded, relevant))
+    forwarded_count = sum(forwarded)
+    relevant_count = sum(relevant)
+    return {
+        "items": len(relevant),
+        "relevant": relevant_count,
+        "forwarded": forwarded_count,
+        "precision": true_positives / forwarded_count if forwarded_count else 1.0,
+        "recall": true_positives / relevant_count if relevant_count else 1.0,
+        "discard_rate": 1 - forwarded_count / len(relevant) if relevant else 0.0,
+    }
+
+
+class NewsPrefilter:
+    """Decides which news items are worth sending to the model. Untrained, it forwards everything."""
+
+    def __init__(self, model: TfidfLogisticModel = None, threshold: float = 0.0, report: dict = None):
+        self.model = model
+        self.threshold = threshold
+        self.report = report or {}
+
+    @classmethod
+    def train(cls, labeled_items: list) -> "NewsPrefilter":
+        """
+        Trains on items categorized by the model and picks the discard threshold on held-out items.
+        `report` holds the held-out precision and recall of forwarding (relevant = not UNRELATED).
+        """
+        relevant = [item["category"] != "UNRELATED" for item in labeled_items]
+        if len(labeled_items) < MIN_TRAINING_ITEMS or sum(relevant) < MIN_RELEVANT_ITEMS:
+            return cls(report={"trained": False, "items": len(labeled_items), "relevant": sum(relevant)})
+
+        train, holdout = [], []
+        for item, is_relevant in zip(labeled_items, relevant):
+            (holdout if _is_holdout(item["key"]) else train).append((item_text(item), is_relevant))
+        model = TfidfLogisticModel().fit([text for text, _ in train], [label for _, label in train])
+
+        texts = [text for text, _ in holdout]
+        labels = [label for _, label in holdout]
+        keyword = [has_relevant_keyword(text) for text in texts]
+        probabilities = model.predict_proba(texts) if texts else np.zeros(0)
+
+        # Highest threshold that still forwards TARGET_RECALL of the held-out relevant items
+        missed_allowed = int(sum(labels) * (1 - TARGET_RECALL))
+        relevant_scores = sorted(
+            float(p) for p, k, label in zip(probabilities, keyword, labels) if label and not k
+        )
+        if relevant_scores:
+            threshold = relevant_scores[min(missed_allowed, len(relevant_scores) - 1)]
+        else:
+            threshold = MAX_DISCARD_PROBABILITY
+        threshold = min(threshold, MAX_DISCARD_PROBABILITY)
+
+        forwarded = [k or p >= threshold for p, k in zip(probabilities, keyword)]
+        report = {"trained": True, "threshold": threshold, "vocabulary": len(model.vocabulary),
+                  "training_items": len(train), **_scores(forwarded, labels)}
+        return cls(model, threshold, report)
+
+    def split(self, news_items: list) -> tuple:
+        """Returns (items to send to the model, items discarded as unrelated)."""
+        if self.model is None or not news_items:
+            return list(news_items), []
+        texts = [item_text(item) for item in news_items]
+        probabilities = self.model.predict_proba(texts)
+        candidates, discarded = [], []
+        for item, text, probability in zip(news_items, texts, probabilities):
+            if has_relevant_keyword(text) or probability >= self.threshold:
+                candidates.append(item)
+            else:
+                discarded.append(item)
+        return candidates, discarded
+
+
+def format_report(report: dict) -> str:
+    if not report.get("trained"):
+        return (f"Pre-filter not trained: {report.get('items', 0)} stored verdicts, {report.get('relevant', 0)} relevant "
+                f"(needs {MIN_TRAINING_ITEMS} and {MIN_RELEVANT_ITEMS})")
+    return (f"Pre-filter on {report['items']} held-out verdicts ({report['relevant']} relevant): "
+            f"precision {report['precision']:.2f}, recall {report['recall']:.2f}, "
+            f"discards {report['discard_rate']:.0%} (threshold {report['threshold']:.3f}, "
+            f"{report['training_items']} training items, {report['vocabulary']} terms)")
+
+
+if __name__ == "__main__":
+    from .news_store import get_news_store
+
+    logging.basicConfig(level=logging.WARNING)
+    print(format_report(NewsPrefilter.train(get_news_store().labeled_items()).report))
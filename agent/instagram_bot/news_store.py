@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+NEWS_STORE_PATH = Path("data/news_store.db")
+# Items are only reported for today and yesterday; older ones are kept as training data for the pre-filter
+NEWS_RETENTION = timedelta(days=60)
+VERDICT_RETENTION = timedelta(days=7)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def news_key(item: dict) -> str:
+    """
+    Identifies a news item across runs: its link without tracking parameters and fragment,
+    or a hash of its title and summary if it has no link.
+    """
+    link = (item.get("link") or "").strip()
+    if link:
+        parsed = urlparse(link)
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if not k.lower().startswith("utm_")]
+        path = parsed.path.rstrip("/") or "/"
+        return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", urlencode(query), ""))
+    text = f"{item.get('title', '').strip()}\n{item.get('summary', '').strip()}"
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """
+    News items seen by the news monitor, with the verdicts already obtained for them:
+    each item's category, its content-plan fit (per version of the content plan) and the
+    mourning-day analysis of each set of stressful items. A run only sends the items and
+    sets it has not seen before to the model.
+    """
+
+    def __init__(self, path: Path = NEWS_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    key TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    first_seen TEXT NOT NULL,
+                    category TEXT,
+                    analysis TEXT,
+                    classified_by TEXT
+                )
+                """
+            )
+            # Stores created before the pre-filter lack these columns
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(items)")}
+            for column in ("summary", "classified_by"):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE items ADD COLUMN {column} TEXT")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS content_fit (
+                    key TEXT NOT NULL,
+                    plan_hash TEXT NOT NULL,
+                    recommendation TEXT NOT NULL,
+                    PRIMARY KEY (key, plan_hash)
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+
+    def _select(self, query: str, keys: list, *params) -> list:
+        rows = []
+        with self.lock:
+            # Chunked to stay under SQLite's limit on query parameters
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows.extend(self.conn.execute(query.format(placeholders=placeholders), (*params, *chunk)).fetchall())
+        return rows
+
+    def record_seen(self, items: list):
+        """Remembers items that were not seen before."""
+        now = _now().isoformat()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (key, title, summary, first_seen) VALUES (?, ?, ?, ?)",
+                [(item["key"], item.get("title", ""), item.get("summary", ""), now) for item in items],
+            )
+
+    def seen(self, keys: list) -> set:
+        """The keys among `keys` of items seen before."""
+        return {row["key"] for row in self._select("SELECT key FROM items WHERE key IN ({placeholders})", keys)}
+
+    def categories(self, keys: list) -> dict:
+        """Cached category analyses of items, as key -> analysis."""
+        rows = self._select("SELECT key, analysis FROM items WHERE analysis IS NOT NULL AND key IN ({placeholders})", keys)
+        return {row["key"]: json.loads(row["analysis"]) for row in rows}
+
+    def save_categories(self, analyses: dict, classified_by: str = "model"):
+        """Stores category analyses; `classified_by` tells model verdicts from pre-filter ones."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE items SET category = ?, analysis = ?, classified_by = ? WHERE key = ?",
+                [(analysis.get("category", "UNRELATED").upper(), json.dumps(analysis, ensure_ascii=False), classified_by, key)
+                 for key, analysis in analyses.items()],
+            )
+
+    def recent_items(self, limit: int = 500) -> list:
+        """The most recently seen items, as dicts with key, title and summary."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, title, summary FROM items ORDER BY first_seen DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def labeled_items(self) -> list:
+        """Items categorized by the model, as dicts with key, title, summary and category."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, title, summary, category FROM items "
+                "WHERE category IS NOT NULL AND COALESCE(classified_by, 'model') = 'model'"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def content_fits(self, keys: list, plan_hash: str) -> dict:
+        """Cached content-plan recommendations of items for a content plan version, as key -> recommendation."""
+        rows = self._select(
+            "SELECT key, recommendation FROM content_fit WHERE plan_hash = ? AND key IN ({placeholders})", keys, plan_hash
+        )
+        return {row["key"]: json.loads(row["recommendation"]) for row in rows}
+
+    def save_content_fits(self, recommendations: dict, plan_hash: str):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO content_fit (key, plan_hash, recommendation) VALUES (?, ?, ?)",
+                [(key, plan_hash, json.dumps(rec, ensure_ascii=False)) for key, rec in recommendations.items()],
+            )
+
+    def verdict(self, key: str):
+        with self.lock:
+            row = self.conn.execute("SELECT result FROM verdicts WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def save_verdict(self, key: str, result: dict):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), _now().isoformat()),
+            )
+
+    def prune(self, retention: timedelta = NEWS_RETENTION, verdict_retention: timedelta = VERDICT_RETENTION):
+        """Forgets items first seen longer than `retention` ago, and verdicts older than `verdict_retention`."""
+        cutoff = (_now() - retention).isoformat()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM content_fit WHERE key IN (SELECT key FROM items WHERE first_seen < ?)", (cutoff,)
+            )
+            removed = self.conn.execute("DELETE FROM items WHERE first_seen < ?", (cutoff,)).rowcount
+            self.conn.execute("DELETE FROM verdicts WHERE created_at < ?", ((_now() - verdict_retention).isoformat(),))
+        if removed:
+            logger.info(f"Forgot {removed} news items older than {retention.days} days")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_news_store() -> NewsStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore()
+    return _store
@@ -0,0 +1,26 @@
+import logging
+import threading
+import time
+
+from .config import OPENAI_API_KEY
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared OpenAI client. The openai package takes most of a second to import,
+    so it is imported, and the client built, on first use rather than at startup.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                started = time.perf_counter()
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+                logger.info(f"OpenAI client created in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return _client
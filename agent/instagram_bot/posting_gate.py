@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+from datetime import datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+
+import pytz
+
+from .tenants import data_path
+
+logger = logging.getLogger(__name__)
+
+GATE_FILE_NAME = "posting_gate.json"
+GATE_TIMEZONE = pytz.timezone("Europe/Kyiv")
+DEFAULT_OVERRIDE_HOURS = 24
+HOLD = "hold"
+OPEN = "open"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _end_of_day(now: datetime) -> datetime:
+    """Local midnight after `now`, in UTC."""
+    tomorrow = now.astimezone(GATE_TIMEZONE).date() + timedelta(days=1)
+    return GATE_TIMEZONE.localize(datetime.combine(tomorrow, dt_time(0))).astimezone(timezone.utc)
+
+
+class PostingGate:
+    """
+    Whether a tenant may publish right now. Holds two dated, expiring records: the news verdict,
+    set by the news monitor from its mourning day analysis and valid until local midnight, and
+    an admin override, which takes precedence while it lasts. The records are kept in memory and
+    written through to a JSON file, so the publish paths check them without rerunning the news
+    pipeline.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        # "news" / "admin" -> {"status", "date", "reason", "source", "set_at", "expires_at"}
+        self.records = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            self.records = json.loads(self.path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Posting gate {self.path} is corrupted, starting open: {e}")
+            self.records = {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.records, ensure_ascii=False, indent=2)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.replace(self.path)
+
+    def _active(self, name: str, now: datetime):
+        record = self.records.get(name)
+        if record and datetime.fromisoformat(record["expires_at"]) > now:
+            return record
+        return None
+
+    def _set(self, name: str, status: str, reason: str, source: str, now: datetime, expires_at: datetime) -> dict:
+        record = {
+            "status": status,
+            "date": now.astimezone(GATE_TIMEZONE).date().isoformat(),
+            "reason": reason,
+            "source": source,
+            "set_at": now.isoformat(),
+            "expires_at": expires_at.isoformat(),
+        }
+        self.records[name] = record
+        self._save()
+        return record
+
+    def check(self, now: datetime = None):
+        """The record holding posts back, or None if posting is allowed."""
+        now = now or _now()
+        with self.lock:
+            override = self._active("admin", now)
+            if override:
+                return override if override["status"] == HOLD else None
+            verdict = self._active("news", now)
+            return verdict if verdict and verdict["status"] == HOLD else None
+
+    def status(self, now: datetime = None) -> dict:
+        """The unexpired records, as name -> record."""
+        now = now or _now()
+        with self.lock:
+            records = {name: self._active(name, now) for name in ("admin", "news")}
+        return {name: record for name, record in records.items() if record}
+
+    def set_news_verdict(self, mourning_analysis: dict, now: datetime = None) -> dict:
+        """
+        Records a mourning day analysis for the rest of the local day. A mourning day stays
+        one: a later analysis of the same day does not reopen the gate.
+        """
+        now = now or _now()
+        status = HOLD if mourning_analysis.get("is_mourning_day") else OPEN
+        with self.lock:
+            current = self._active("news", now)
+            if current and (current["status"] == status or current["status"] == HOLD):
+                return current
+            record = self._set("news", status, mourning_analysis.get("reason", ""), "news", now, _end_of_day(now))
+        logger.info(f"Posting gate news verdict: {status} until {record['expires_at']}")
+        return record
+
+    def override(self, status: str, hours: float = DEFAULT_OVERRIDE_HOURS, reason: str = "", now: datetime = None) -> dict:
+        """Holds or opens posting for `hours`, whatever the news verdict."""
+        if status not in (HOLD, OPEN):
+            raise ValueError(f"Invalid posting gate status '{status}'")
+        if hours <= 0:
+            raise ValueError(f"Override must last a positive number of hours, got {hours}")
+        now = now or _now()
+        with self.lock:
+            record = self._set("admin", status, reason or "set by admin", "admin", now, now + timedelta(hours=hours))
+        logger.info(f"Posting gate override: {status} until {record['expires_at']}")
+        return record
+
+    def clear_override(self) -> bool:
+        with self.lock:
+            removed = self.records.pop("admin", None) is not None
+            if removed:
+                self._save()
+        return removed
+
+
+def resume_time(record: dict, now: datetime = None) -> datetime:
+    """The first time after a hold expires at the same time of day as `now`, to defer a post to."""
+    now = now or _now()
+    expires_at = datetime.fromisoformat(record["expires_at"])
+    local_now = now.astimezone(GATE_TIMEZONE)
+    days = 1
+    while True:
+        candidate = GATE_TIMEZONE.localize(datetime.combine(local_now.date() + timedelta(days=days), local_now.time()))
+        if candidate >= expires_at:
+            return candidate.astimezone(timezone.utc)
+        days += 1
+
+
+def describe(record: dict) -> str:
+    expires_at = datetime.fromisoformat(record["expires_at"]).astimezone(GATE_TIMEZONE)
+    who = "admin override" if record["source"] == "admin" else "mourning day"
+    return f"Posting is on hold until {expires_at.strftime('%Y-%m-%d %H:%M %Z')} ({who}: {record['reason']})"
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_posting_gate() -> PostingGate:
+    """The posting gate of the current tenant."""
+    path = data_path(GATE_FILE_NAME)
+    with _gates_lock:
+        if path not in _gates:
+            _gates[path] = PostingGate(path)
+        return _gates[path]
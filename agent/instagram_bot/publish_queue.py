@@ -0,0 +1,255 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from pathlib import Path
+
+from . import instagram
+from .posting_gate import describe
+from .tenants import current_tenant, data_path
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_QUEUE_FILE_NAME = "publish_queue.db"
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 15
+# Clock skew allowed when looking for a post uploaded by an interrupted attempt
+UPLOAD_LOOKBACK = timedelta(minutes=2)
+
+
+@cache
+def transient_errors() -> tuple:
+    """Upload errors worth retrying. Built on first use, as instagrapi is slow to import."""
+    import requests
+    from instagrapi.exceptions import (
+        ClientConnectionError,
+        ClientIncompleteReadError,
+        ClientJSONDecodeError,
+        ClientRequestTimeout,
+        ClientThrottledError,
+        ClientUnknownError,
+        PhotoNotUpload,
+        PleaseWaitFewMinutes,
+        RateLimitError,
+        UnknownError,
+    )
+
+    return (
+        ClientConnectionError,
+        ClientIncompleteReadError,
+        ClientJSONDecodeError,
+        ClientRequestTimeout,
+        ClientThrottledError,
+        ClientUnknownError,
+        PhotoNotUpload,
+        PleaseWaitFewMinutes,
+        RateLimitError,
+        UnknownError,
+        requests.ConnectionError,
+        requests.Timeout,
+        ConnectionError,
+        TimeoutError,
+    )
+
+# Publish states of a draft, in order
+QUEUED = "queued"
+UPLOADING = "uploading"
+UPLOADED = "uploaded"
+MOVED = "moved"
+FAILED = "failed"
+
+
+class PublishHeld(Exception):
+    """An interrupted publish left pending because the posting gate holds posts back."""
+
+    def __init__(self, hold: dict):
+        super().__init__(describe(hold))
+        self.hold = hold
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PublishQueue:
+    """
+    Publishes drafted posts with a durable record per draft; publishes of the same draft run
+    one at a time, different drafts do not wait for each other.
+    The record goes queued -> uploading -> uploaded (media code known) -> moved, so a
+    publish that is retried, or resumed after a crash, continues where it stopped and
+    never uploads a post that already went live. Transient upload errors are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, path: Path, sleep=time.sleep):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sleep = sleep
+        # Guards the database and the post locks only; never held during an upload or a backoff
+        self.lock = threading.Lock()
+        self._post_locks = {}
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS publishes (
+                    post_directory_name TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    upload_started_at TEXT,
+                    media_pk TEXT,
+                    media_code TEXT,
+                    last_error TEXT,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+
+    def get(self, post_directory_name: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM publishes WHERE post_directory_name = ?", (post_directory_name,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _update(self, post_directory_name: str, **fields):
+        fields["updated_at"] = _now().isoformat()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO publishes (post_directory_name, state, updated_at) VALUES (?, ?, ?)",
+                (post_directory_name, QUEUED, fields["updated_at"]),
+            )
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            self.conn.execute(
+                f"UPDATE publishes SET {assignments} WHERE post_directory_name = ?",
+                (*fields.values(), post_directory_name),
+            )
+
+    def _post_lock(self, post_directory_name: str) -> threading.Lock:
+        with self.lock:
+            return self._post_locks.setdefault(post_directory_name, threading.Lock())
+
+    def pending(self) -> list:
+        """Drafts whose publish was interrupted before it finished."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT post_directory_name FROM publishes WHERE state IN (?, ?, ?)", (QUEUED, UPLOADING, UPLOADED)
+            ).fetchall()
+        return [row["post_directory_name"] for row in rows]
+
+    def publish(self, post_directory_name: str) -> dict:
+        """
+        Publishes a draft and returns its record, with `already_published` set if an earlier
+        attempt had already finished. Raises if the upload fails for good.
+        """
+        with self._post_lock(post_directory_name):
+            record = self.get(post_directory_name)
+            if record and record["state"] == MOVED:
+                logger.info(f"Post {post_directory_name} was already published as {record['media_code']}")
+                return {**record, "already_published": True}
+            if record is None:
+                self._update(post_directory_name, state=QUEUED)
+                record = self.get(post_directory_name)
+
+            if record["state"] != UPLOADED:
+                self._upload(post_directory_name, record)
+
+            instagram.move_to_posted(post_directory_name)
+            self._update(post_directory_name, state=MOVED, last_error=None)
+            return {**self.get(post_directory_name), "already_published": False}
+
+    def _upload(self, post_directory_name: str, record: dict):
+        try:
+            caption = data_path("future_posts", post_directory_name, "post.txt").read_text()
+        except OSError as e:
+            self._update(post_directory_name, state=FAILED, last_error=f"{type(e).__name__}: {e}")
+            raise
+        started_at = record["upload_started_at"]
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            # An earlier attempt may have gone through before it was interrupted
+            if started_at and self._recover_upload(post_directory_name, caption, started_at):
+                return
+
+            started_at = _now().isoformat()
+            self._update(post_directory_name, state=UPLOADING, upload_started_at=started_at,
+                         attempts=(record["attempts"] or 0) + attempt)
+            try:
+                media = instagram.upload_post(post_directory_name)
+            except transient_errors() as e:
+                self._update(post_directory_name, last_error=f"{type(e).__name__}: {e}")
+                if attempt == MAX_ATTEMPTS:
+                    self._update(post_directory_name, state=FAILED)
+                    logger.error(f"Publishing {post_directory_name} failed after {attempt} attempts: {e}")
+                    raise
+                delay = BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.warning(f"Transient error publishing {post_directory_name} (attempt {attempt}), retrying in {delay}s: {e}")
+                self.sleep(delay)
+                continue
+            except Exception as e:
+                self._update(post_directory_name, state=FAILED, last_error=f"{type(e).__name__}: {e}")
+                raise
+
+            self._update(post_directory_name, state=UPLOADED, media_pk=str(media.pk), media_code=media.code)
+            return
+
+    def _recover_upload(self, post_directory_name: str, caption: str, started_at: str) -> bool:
+        """
+        Looks for the post an earlier attempt may have uploaded. If the check itself fails, the record
+        stays `uploading` and the error is raised: uploading again could publish the post twice.
+        """
+        since = datetime.fromisoformat(started_at) - UPLOAD_LOOKBACK
+        try:
+            media = instagram.find_recent_post(caption, since)
+        except Exception as e:
+            logger.error(f"Could not check whether {post_directory_name} was already uploaded, not uploading it again: {e}")
+            self._update(post_directory_name, state=UPLOADING,
+                         last_error=f"Could not check for an earlier upload: {type(e).__name__}: {e}")
+            raise
+        if media is None:
+            return False
+        logger.warning(f"Post {post_directory_name} was already uploaded as {media.code}, not uploading it again")
+        self._update(post_directory_name, state=UPLOADED, media_pk=str(media.pk), media_code=media.code)
+        return True
+
+    def resume(self, hold: dict = None) -> list:
+        """
+        Finishes publishes interrupted by a crash or restart. Returns (post_directory_name, record or error) pairs.
+        While `hold` (the posting gate record holding posts back) is given, drafts that are not uploaded
+        yet are left pending, with a PublishHeld error; uploaded ones are live already and are finished.
+        """
+        results = []
+        for post_directory_name in self.pending():
+            if hold and self.get(post_directory_name)["state"] != UPLOADED:
+                logger.info(f"Not resuming publish of {post_directory_name}: posting is on hold")
+                results.append((post_directory_name, PublishHeld(hold)))
+                continue
+            logger.info(f"Resuming interrupted publish of {post_directory_name}")
+            try:
+                results.append((post_directory_name, self.publish(post_directory_name)))
+            except Exception as e:
+                logger.error(f"Could not resume publish of {post_directory_name}: {e}", exc_info=True)
+                results.append((post_directory_name, e))
+        return results
+
+
+_queues = {}
+_queue_lock = threading.Lock()
+
+
+def get_publish_queue() -> PublishQueue:
+    """Returns the current tenant's publish queue."""
+    tenant = current_tenant()
+    with _queue_lock:
+        if tenant.name not in _queues:
+            _queues[tenant.name] = PublishQueue(tenant.path(PUBLISH_QUEUE_FILE_NAME))
+    return _queues[tenant.name]
+
+
+def publish_post(post_directory_name: str) -> dict:
+    """Publishes a drafted post through the publish queue. Shared by /post, the agent tool and the scheduler."""
+    return get_publish_queue().publish(post_directory_name)
@@ -1,25 +1,93 @@
-import schedule
-import time
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
 import logging
+import random
+import threading
+from collections import Counter, deque
+from functools import partial
+from datetime import datetime, date, time as dt_time, timedelta, timezone
 from pathlib import Path
-import json
-from .instagram import make_post
+
+import pytz
+
+from .instagram import preflight_post
+from .publish_queue import PublishHeld, get_publish_queue, publish_post
 from .agentic_flow import agentic_flow
 from .telegram_bot import APPLICATION
-from .config import ADMIN_TELEGRAM_ID, SAVED_PROMPTS
-from .news_monitor import news_monitoring_task
-import asyncio
+from .config import SAVED_PROMPTS, SCHEDULER_WORKERS, SCHEDULER_MISFIRE_GRACE_MINUTES, PREFLIGHT_MINUTES, NEWS_WATCH_MINUTES
+from .file_watcher import FileWatcher
+from .job_store import JobStore
+from .news_monitor import NewsWatcher, news_monitoring_task
+from .posting_gate import describe, get_posting_gate, resume_time
+from .tenants import TENANTS, current_tenant, data_path, use_tenant
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_TIMEZONE = pytz.timezone("Europe/Kyiv")
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+UNIT_SECONDS = {"seconds": 1, "minutes": 60, "hours": 3600, "days": 86400, "weeks": 604800}
+# Safety net only: the loop is woken up by the timer of the next job, or when jobs change
+MAX_SLEEP_SECONDS = 60
+
+# Lower number starts first when several jobs are waiting for a free worker
+TASK_PRIORITIES = {
+    "reload_all_tasks": 0,
+    "task_post": 1,
+    "task_story": 1,
+    "execute_agentic_flow": 2,
+    "news_monitoring": 3,
+}
+DEFAULT_PRIORITY = 2
+# Maximum number of concurrently running jobs of one task type
+TASK_LIMITS = {
+    "task_post": 1,
+    "task_story": 1,
+    "execute_agentic_flow": 1,
+    "news_monitoring": 1,
+}
+DEFAULT_LIMIT = 1
+# Per-run timeouts in seconds
+TASK_TIMEOUTS = {
+    "reload_all_tasks": 60,
+    "task_post": 10 * 60,
+    "task_story": 10 * 60,
+    "execute_agentic_flow": 60 * 60,
+    "news_monitoring": 15 * 60,
+}
+DEFAULT_TIMEOUT = 30 * 60
+LAG_HISTORY = 100
+SCHEDULE_FILE_NAMES = ["static.json", "generated.json"]
+
+
+class CancelJob:
+    """Returned by a task to remove its job from the schedule, e.g. after a one-shot post."""
+
+
+class DeferJob:
+    """Returned by a task to run its job again at `until`, if that is before its next regular run."""
+
+    def __init__(self, until: datetime):
+        self.until = until
+
 
 # --- Utility functions for sending messages to admin ---
 async def reply_message(message: str) -> None:
-    admin_chat_id = ADMIN_TELEGRAM_ID.split(',')[0] if ADMIN_TELEGRAM_ID else None
+    tenant = current_tenant()
+    admin_chat_id = tenant.admin_chat_id
+    if len(TENANTS) > 1:
+        message = f"[{tenant.name}] {message}"
     if not admin_chat_id or 'tg' not in APPLICATION or not APPLICATION['tg'] or not APPLICATION['tg'].bot:
         print(message)
         return
     await APPLICATION['tg'].bot.send_message(chat_id=admin_chat_id, text=message)
 
 async def reply_photo(photo_path: str) -> None:
-    admin_chat_id = ADMIN_TELEGRAM_ID.split(',')[0] if ADMIN_TELEGRAM_ID else None
+    admin_chat_id = current_tenant().admin_chat_id
     if not admin_chat_id or 'tg' not in APPLICATION or not APPLICATION['tg'] or not APPLICATION['tg'].bot:
         print(photo_path)
         return
@@ -27,46 +95,113 @@ async def reply_photo(photo_path: str) -> None:
 
 # --- Task Functions ---
 
-def execute_agentic_flow(prompt=None, saved_prompt=None, **kwargs):
-    """Placeholder for the weekly planning task."""
+async def execute_agentic_flow(prompt=None, saved_prompt=None, **kwargs):
+    """Runs the agentic flow with a prompt or a saved prompt, e.g. the weekly planning."""
     if saved_prompt:
         prompt = SAVED_PROMPTS[saved_prompt]
 
     logger.info(f"Running execute_agentic_flow with prompt: {prompt}")
-    asyncio.run(agentic_flow(
+    await agentic_flow(
         prompt, {}, reply_message, reply_photo, auto_mode=True
-    ))
+    )
 
-def publish_post_task(**kwargs):
-    """Placeholder for the publish post task."""
+async def publish_post_task(**kwargs):
+    """
+    Publishes a drafted post. One-shot: the job is removed afterwards. While the posting gate
+    holds posts back, the post is deferred to the same time on the first day after the hold.
+    """
     logger.info(f"Running publish_post_task with args: {kwargs}")
-    make_post(kwargs['post_directory_name'])
-    asyncio.run(reply_message("Post {} published successfully.".format(kwargs['post_directory_name'])))
-    return schedule.CancelJob
+    hold = get_posting_gate().check()
+    if hold:
+        until = resume_time(hold)
+        logger.info(f"Deferring post {kwargs['post_directory_name']} to {until}: {describe(hold)}")
+        await reply_message(
+            f"⏸ Post {kwargs['post_directory_name']} deferred to "
+            f"{until.astimezone(SCHEDULE_TIMEZONE).strftime('%Y-%m-%d %H:%M')}. {describe(hold)}"
+        )
+        return DeferJob(until)
+    record = await asyncio.to_thread(publish_post, kwargs['post_directory_name'])
+    if record["already_published"]:
+        logger.info(f"Post {kwargs['post_directory_name']} was already published, nothing to do")
+        return CancelJob
+    await reply_message("Post {} published successfully.".format(kwargs['post_directory_name']))
+    return CancelJob
 
-def publish_story_task(**kwargs):
+async def preflight_post_task(**kwargs):
+    """Checks and prepares a drafted post ahead of its publish time, alerting the admin on problems."""
+    post_directory_name = kwargs.get('post_directory_name')
+    try:
+        await asyncio.to_thread(preflight_post, post_directory_name)
+    except Exception as e:
+        await reply_message(f"⚠️ Pre-flight check for post {post_directory_name} failed: {e}")
+        raise
+
+async def publish_story_task(**kwargs):
     """Placeholder for the publish story task."""
     logger.info(f"Running publish_story_task with args: {kwargs}")
-    return schedule.CancelJob
+    return CancelJob
 
-def news_monitoring_job(**kwargs):
+async def news_monitoring_job(**kwargs):
     """News monitoring job that analyzes current events and provides content recommendations."""
     logger.info("Running news monitoring job")
-    asyncio.run(news_monitoring_task(reply_message, reply_photo))
+    await news_monitoring_task(reply_message, reply_photo)
+
+def schedule_files() -> list:
+    """The schedule files of the current tenant."""
+    return [data_path("schedule", name) for name in SCHEDULE_FILE_NAMES]
 
-def reload_all_tasks():
+
+def reload_all_tasks(full: bool = False):
     """
-    Clears all existing jobs and reloads them from the JSON configuration files.
-    This function is run periodically to pick up any changes.
+    Brings the current tenant's scheduled jobs in line with its JSON configuration files.
+    Jobs are matched by their stable task id: only new entries are validated and scheduled,
+    entries that disappeared are removed, and unchanged jobs keep their next run time.
+    A changed schedule or arguments gives an entry a new id, so it is rescheduled.
+    With full=True all jobs are cleared and rebuilt from scratch.
     """
-    logger.info("Clearing all scheduled jobs and reloading...")
-    schedule.clear()
-    
-    base_path = Path("data/schedule")
-    load_tasks_from_file(base_path / "static.json")
-    load_tasks_from_file(base_path / "generated.json")
- 
-    logger.info(f"Reload complete. Total jobs scheduled: {len(schedule.get_jobs())}")
+    scheduler = get_scheduler()
+    if full:
+        logger.info("Clearing all scheduled jobs and reloading...")
+        scheduler.clear()
+
+    desired = {}
+    for file_path in schedule_files():
+        for task in read_tasks_from_file(file_path):
+            desired[task_id(task)] = task
+
+    removed = [job_id for job_id in list(scheduler.jobs) if job_id not in desired]
+    for job_id in removed:
+        scheduler.remove_job(job_id)
+
+    added = 0
+    for job_id, task in desired.items():
+        if job_id in scheduler.jobs:
+            continue
+        if scheduler.store and scheduler.store.is_completed(job_id):
+            logger.debug(f"Task {task.get('task_name')} ({job_id}) has already completed, skipping")
+            continue
+        _schedule_job(task)
+        added += job_id in scheduler.jobs
+
+    logger.info(
+        f"Reload of {current_tenant().name} complete: {added} added, {len(removed)} removed. "
+        f"Total jobs scheduled: {len(scheduler.get_jobs())}"
+    )
+
+
+def _reload_tenant(tenant_name: str, full: bool = False):
+    with use_tenant(tenant_name):
+        reload_all_tasks(full=full)
+
+
+def request_reload():
+    """Asks the running scheduler to reload the current tenant's jobs. Safe to call from any thread."""
+    tenant = current_tenant()
+    loop = get_scheduler()._loop
+    if loop is None or loop.is_closed():
+        logger.info("Scheduler is not running, reload request ignored")
+        return
+    loop.call_soon_threadsafe(_reload_tenant, tenant.name)
 
 # --- Task Validation Functions ---
 
@@ -78,16 +213,16 @@ def validate_publish_post_task(task_details: dict) -> bool:
     """Validates the payload for a publish_post_task."""
     task_args = task_details.get("task_args", {})
     post_directory_name = task_args.get("post_directory_name")
-    
+
     if not post_directory_name:
         logger.error(f"Missing 'post_directory_name' for task_post: {task_details}")
         return False
-    
-    post_path = Path("data/future_posts") / post_directory_name
+
+    post_path = data_path("future_posts", post_directory_name)
     if not post_path.is_dir():
         logger.warning(f"Post directory '{post_path}' not found. Skipping schedule for task: {task_details}")
         return False
-        
+
     return True
 
 # --- Task Mappings ---
@@ -99,6 +234,11 @@ TASKS = {
     "reload_all_tasks": reload_all_tasks,
 }
 
+# Run PREFLIGHT_MINUTES before each run of the task, with the same arguments
+TASK_PREFLIGHTS = {
+    "task_post": preflight_post_task,
+}
+
 TASKS_VALIDATION = {
     "execute_agentic_flow": validate_generic_task,
     "task_post": validate_publish_post_task,
@@ -107,7 +247,519 @@ TASKS_VALIDATION = {
     "reload_all_tasks": validate_generic_task,
 }
 
-logger = logging.getLogger(__name__)
+# --- Triggers and jobs ---
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_at(at: str, unit: str) -> dt_time:
+    """
+    Parses the `at` field the way the schedule library did:
+    "HH:MM[:SS]" for daily and weekly jobs, "MM:SS" or ":MM" for hourly jobs and ":SS" for jobs every minute.
+    """
+    if unit in ("days", "weeks"):
+        parts = [int(p) for p in at.split(":")]
+        return dt_time(*parts)
+    if unit == "hours":
+        if at.startswith(":"):
+            return dt_time(0, int(at[1:]))
+        minute, second = at.split(":")
+        return dt_time(0, int(minute), int(second))
+    if unit == "minutes":
+        return dt_time(0, 0, int(at.lstrip(":")))
+    raise ValueError(f"'at' is not supported for unit '{unit}'")
+
+
+class Trigger:
+    """
+    Computes run times for a schedule entry, e.g. {"unit": "weeks", "day": "monday", "at": "12:00"}
+    or {"unit": "minutes", "interval": 10}. Times of day are in Europe/Kyiv.
+    """
+
+    def __init__(self, schedule_info: dict):
+        self.day = schedule_info.get("day") or None
+        self.unit = "weeks" if self.day else schedule_info.get("unit", "days")
+        self.interval = int(schedule_info.get("interval", 1))
+        self.latest = schedule_info.get("latest")
+        at = schedule_info.get("at") or None
+
+        if self.unit not in UNIT_SECONDS:
+            raise ValueError(f"Invalid unit '{self.unit}'")
+        if self.day and self.day not in WEEKDAYS:
+            raise ValueError(f"Invalid day '{self.day}'")
+        if self.interval < 1:
+            raise ValueError(f"Invalid interval {self.interval}")
+        self.at = _parse_at(at, self.unit) if at else None
+
+    def _period(self) -> timedelta:
+        interval = self.interval
+        if self.latest:
+            interval = random.randint(self.interval, int(self.latest))
+        return timedelta(seconds=interval * UNIT_SECONDS[self.unit])
+
+    def next_after(self, now: datetime) -> datetime:
+        """Returns the first run time strictly after `now` (an aware datetime), in UTC."""
+        if self.at is None and self.day is None:
+            return now + self._period()
+
+        local_now = now.astimezone(SCHEDULE_TIMEZONE)
+        if self.unit in ("days", "weeks"):
+            run_date = local_now.date()
+            step_days = self.interval * (7 if self.unit == "weeks" else 1)
+            if self.day:
+                run_date += timedelta(days=(WEEKDAYS.index(self.day) - run_date.weekday()) % 7)
+            candidate = self._localize(run_date, self.at or dt_time(0))
+            if candidate <= now:
+                candidate = self._localize(run_date + timedelta(days=step_days), self.at or dt_time(0))
+            return candidate.astimezone(timezone.utc)
+
+        # Hourly and minutely jobs at a given minute / second
+        if self.unit == "hours":
+            candidate = local_now.replace(minute=self.at.minute, second=self.at.second, microsecond=0)
+        else:
+            candidate = local_now.replace(second=self.at.second, microsecond=0)
+        while candidate <= now:
+            candidate += timedelta(seconds=self.interval * UNIT_SECONDS[self.unit])
+        return candidate.astimezone(timezone.utc)
+
+    @staticmethod
+    def _localize(run_date: date, at: dt_time) -> datetime:
+        return SCHEDULE_TIMEZONE.localize(datetime.combine(run_date, at))
+
+
+def task_id(task_details: dict) -> str:
+    """Stable id of a schedule entry, derived from its name, schedule and arguments."""
+    key = json.dumps(
+        [task_details.get("task_name"), task_details.get("schedule"), task_details.get("task_args", {})],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+class ScheduledJob:
+    def __init__(self, job_id: str, task_name: str, task_args: dict, trigger: Trigger, schedule_info: dict,
+                 tenant: str = None):
+        self.id = job_id
+        self.tenant = tenant
+        self.task_name = task_name
+        self.task_args = task_args
+        self.trigger = trigger
+        self.schedule_info = schedule_info
+        self.next_run = None
+        self.last_run = None
+        self.last_lag = None
+        self.last_result = None
+        self.preflight_result = None
+
+    def __repr__(self):
+        return f"<ScheduledJob {self.id} {self.task_name} {self.task_args} next_run={self.next_run}>"
+
+
+class JobExecutor:
+    """
+    Runs due jobs as tasks on the event loop with at most `workers` jobs at a time.
+    Waiting jobs start in priority order (publishing, then planning, then monitoring),
+    each task type has its own concurrency limit per tenant, and every run has a timeout.
+    Every tenant has its own queue; when several tenants wait with the same priority they
+    are served round-robin, so one busy tenant cannot starve the others.
+    Start lag (actual start minus due time) is recorded per job and overall.
+    """
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, now=_utcnow):
+        self.workers = workers
+        self.now = now
+        self.on_cancel = None
+        self.on_defer = None
+        self.on_finish = None
+        # tenant -> heap of (priority, due, seq, job)
+        self._queues = {}
+        # Tenants in the order they are served; a tenant moves to the back when one of its jobs starts
+        self._turns = deque()
+        self._seq = itertools.count()
+        self._queued_keys = set()
+        self._running = {}
+        self._running_by_type = Counter()
+        self.lags = deque(maxlen=LAG_HISTORY)
+
+    @staticmethod
+    def _key(job: ScheduledJob):
+        return job.tenant, job.id
+
+    def is_active(self, job: ScheduledJob) -> bool:
+        key = self._key(job)
+        return key in self._queued_keys or key in self._running
+
+    def submit(self, job: ScheduledJob, due: datetime, start: bool = True):
+        """
+        Queues a due job. With start=False the job only waits in the queue, so that a batch of
+        jobs due at the same moment can be queued first and then started in priority order.
+        """
+        priority = TASK_PRIORITIES.get(job.task_name, DEFAULT_PRIORITY)
+        if job.tenant not in self._queues:
+            self._queues[job.tenant] = []
+            self._turns.append(job.tenant)
+        heapq.heappush(self._queues[job.tenant], (priority, due, next(self._seq), job))
+        self._queued_keys.add(self._key(job))
+        if start:
+            self.start_ready()
+
+    def _can_start(self, job: ScheduledJob) -> bool:
+        return self._running_by_type[(job.tenant, job.task_name)] < TASK_LIMITS.get(job.task_name, DEFAULT_LIMIT)
+
+    def _next_entry(self):
+        """The best startable entry over all tenants: highest priority first, ties in round-robin order."""
+        best = None
+        for tenant in self._turns:
+            entry = min((e for e in self._queues[tenant] if self._can_start(e[3])), default=None)
+            if entry is not None and (best is None or entry[0] < best[0]):
+                best = entry
+        return best
+
+    def start_ready(self):
+        """Starts the highest-priority queued jobs that fit into the free slots and type limits."""
+        while len(self._running) < self.workers:
+            entry = self._next_entry()
+            if entry is None:
+                break
+            job = entry[3]
+            queue = self._queues[job.tenant]
+            queue.remove(entry)
+            heapq.heapify(queue)
+            self._turns.remove(job.tenant)
+            self._turns.append(job.tenant)
+
+            key = self._key(job)
+            self._queued_keys.discard(key)
+            self._running_by_type[(job.tenant, job.task_name)] += 1
+            self._running[key] = asyncio.create_task(self._run_job(job, entry[1]))
+
+    async def _run_job(self, job: ScheduledJob, due: datetime):
+        job.last_run = self.now()
+        job.last_lag = (job.last_run - due).total_seconds()
+        self.lags.append(job.last_lag)
+        timeout = TASK_TIMEOUTS.get(job.task_name, DEFAULT_TIMEOUT)
+        logger.info(f"Running job {job.task_name} ({job.id}), due at {due}, start lag {job.last_lag:.2f}s")
+        late = ""
+        try:
+            with use_tenant(job.tenant) if job.tenant else contextlib.nullcontext():
+                result = TASKS[job.task_name](**job.task_args)
+                if inspect.isawaitable(result):
+                    # The worker thread of a task cannot be stopped, so a timeout is only reported
+                    # and the job keeps its slots until it really finishes
+                    task = asyncio.ensure_future(result)
+                    try:
+                        result = await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        late = " after timeout"
+                        job.last_result = "timeout"
+                        logger.error(f"Job {job.task_name} ({job.id}) timed out after {timeout}s, waiting for it to finish")
+                        if self.on_finish:
+                            self.on_finish(job)
+                        result = await task
+                        logger.warning(f"Job {job.task_name} ({job.id}) finished after its timeout")
+            job.last_result = "ok" + late
+            if result is CancelJob:
+                logger.info(f"Job {job.task_name} ({job.id}) cancelled itself")
+                if self.on_cancel:
+                    self.on_cancel(job)
+            elif isinstance(result, DeferJob):
+                job.last_result = f"deferred to {result.until.isoformat()}"
+                if self.on_defer:
+                    self.on_defer(job, result.until)
+        except Exception as e:
+            job.last_result = f"error{late}: {e}"
+            logger.error(f"Job {job.task_name} ({job.id}) failed: {e}", exc_info=True)
+        finally:
+            self._running.pop(self._key(job), None)
+            self._running_by_type[(job.tenant, job.task_name)] -= 1
+            if self.on_finish:
+                self.on_finish(job)
+            self.start_ready()
+
+    def stats(self) -> dict:
+        """Queue and start lag summary for /schedule."""
+        lags = sorted(self.lags)
+        return {
+            "running": len(self._running),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "workers": self.workers,
+            "lag_p50": lags[len(lags) // 2] if lags else None,
+            "lag_max": lags[-1] if lags else None,
+            "lag_runs": len(lags),
+        }
+
+
+class AsyncScheduler:
+    """
+    Asyncio-native scheduler. Jobs live in a timer heap ordered by next run time; the loop
+    sleeps until the earliest one is due and hands it to the JobExecutor, which runs it as
+    a task on the running event loop.
+    Task types with a pre-flight function also get a pre-flight timer `preflight_lead` before
+    each run, so that checks and preparation are done by the time the run is due.
+    A scheduler that is given an executor shares it; the owner of the executor routes its
+    cancel, defer and finish callbacks (see TenantSchedulers).
+    """
+
+    def __init__(self, now=_utcnow, executor: "JobExecutor" = None, store: JobStore = None,
+                 misfire_grace: timedelta = timedelta(minutes=SCHEDULER_MISFIRE_GRACE_MINUTES),
+                 preflights: dict = None, preflight_lead: timedelta = timedelta(minutes=PREFLIGHT_MINUTES),
+                 tenant: str = None):
+        self.now = now
+        self.tenant = tenant
+        self.jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self.preflights = (preflights or {}) if preflight_lead > timedelta(0) else {}
+        self.preflight_lead = preflight_lead
+        self._preflight_heap = []
+        self._preflight_tasks = set()
+        self.store = store
+        self.misfire_grace = misfire_grace
+        if executor is None:
+            executor = JobExecutor(now=now)
+            executor.on_cancel = self.job_cancelled
+            executor.on_defer = self.defer_job
+            executor.on_finish = self._record_run
+        self.executor = executor
+        self._loop = None
+        self._wakeup = None
+
+    # Job management. Safe to call from the event loop or, for reloads, from other threads.
+
+    def add_job(self, job: ScheduledJob) -> bool:
+        """
+        Adds a job. With a job store, completed one-shot jobs are not added again and a stored
+        next run time is restored; a run missed within the misfire grace window is caught up
+        right away. Returns False if the job was not added.
+        """
+        if self.store:
+            if self.store.is_completed(job.id):
+                logger.info(f"Job {job.task_name} ({job.id}) has already completed, not scheduling it again")
+                return False
+            record = self.store.get(job.id)
+            if job.next_run is None and record and record["next_run"]:
+                job.last_run = record["last_run"]
+                job.last_result = record["last_result"]
+                job.next_run = self._restore_next_run(job, record["next_run"])
+
+        if job.next_run is None:
+            job.next_run = job.trigger.next_after(self.now())
+        job.tenant = self.tenant
+        self.jobs[job.id] = job
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job.id))
+        self._push_preflight(job)
+        if self.store:
+            self.store.save_job(job)
+        self._wake()
+        return True
+
+    def _restore_next_run(self, job: ScheduledJob, stored_next_run: datetime) -> datetime:
+        now = self.now()
+        if stored_next_run >= now:
+            return stored_next_run
+        if now - stored_next_run <= self.misfire_grace:
+            logger.warning(f"Job {job.task_name} ({job.id}) missed its run at {stored_next_run}, catching up now")
+            return stored_next_run
+        logger.warning(
+            f"Job {job.task_name} ({job.id}) missed its run at {stored_next_run}, "
+            f"beyond the misfire grace of {self.misfire_grace}; skipping to the next run"
+        )
+        job.last_result = "misfired"
+        return job.trigger.next_after(now)
+
+    def job_cancelled(self, job: ScheduledJob):
+        self.complete_job(job.id)
+
+    def defer_job(self, job: ScheduledJob, until: datetime):
+        """Runs a job at `until` instead of its next regular run, if the regular run is later."""
+        if job.id not in self.jobs or job.next_run <= until:
+            return
+        job.next_run = until
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job.id))
+        self._push_preflight(job)
+        if self.store:
+            self.store.save_job(job)
+        self._wake()
+
+    def complete_job(self, job_id: str):
+        """Removes a one-shot job and records it as completed, so it is never run again."""
+        if self.store:
+            self.store.mark_completed(job_id, self.now())
+        self.remove_job(job_id)
+
+    def _record_run(self, job: ScheduledJob):
+        if self.store:
+            self.store.record_run(job)
+
+    def remove_job(self, job_id: str):
+        # Heap entries of removed jobs are skipped lazily
+        self.jobs.pop(job_id, None)
+        self._wake()
+
+    def clear(self):
+        self.jobs.clear()
+        self._heap.clear()
+        self._preflight_heap.clear()
+        self._wake()
+
+    def get_jobs(self) -> list:
+        return sorted(self.jobs.values(), key=lambda job: job.next_run)
+
+    def _wake(self):
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # Main loop
+
+    def _seconds_until_next(self, now: datetime):
+        wake_times = []
+        while self._heap:
+            next_run, _, job_id = self._heap[0]
+            job = self.jobs.get(job_id)
+            if job is None or job.next_run != next_run:
+                heapq.heappop(self._heap)
+                continue
+            wake_times.append(next_run)
+            break
+        while self._preflight_heap:
+            preflight_at, _, job_id, run_at = self._preflight_heap[0]
+            job = self.jobs.get(job_id)
+            if job is None or job.next_run != run_at:
+                heapq.heappop(self._preflight_heap)
+                continue
+            wake_times.append(preflight_at)
+            break
+        if not wake_times:
+            return None
+        return max((min(wake_times) - now).total_seconds(), 0)
+
+    # Pre-flight
+
+    def _push_preflight(self, job: ScheduledJob):
+        if job.task_name in self.preflights:
+            preflight_at = job.next_run - self.preflight_lead
+            heapq.heappush(self._preflight_heap, (preflight_at, next(self._seq), job.id, job.next_run))
+
+    def _dispatch_preflights(self, now: datetime):
+        while self._preflight_heap and self._preflight_heap[0][0] <= now:
+            _, _, job_id, run_at = heapq.heappop(self._preflight_heap)
+            job = self.jobs.get(job_id)
+            # Stale entry, or the run itself is already due: nothing left to prepare
+            if job is None or job.next_run != run_at or run_at <= now:
+                continue
+            task = asyncio.create_task(self._run_preflight(job, run_at))
+            self._preflight_tasks.add(task)
+            task.add_done_callback(self._preflight_tasks.discard)
+
+    async def _run_preflight(self, job: ScheduledJob, run_at: datetime):
+        # Must be finished by the time the run is due
+        timeout = max((run_at - self.now()).total_seconds(), 1)
+        logger.info(f"Running pre-flight for {job.task_name} ({job.id}), run due at {run_at}")
+        try:
+            await asyncio.wait_for(self.preflights[job.task_name](**job.task_args), timeout=timeout)
+            job.preflight_result = "ok"
+        except asyncio.TimeoutError:
+            job.preflight_result = "timeout"
+            logger.error(f"Pre-flight for {job.task_name} ({job.id}) did not finish before the run was due")
+        except Exception as e:
+            job.preflight_result = f"error: {e}"
+            logger.error(f"Pre-flight for {job.task_name} ({job.id}) failed: {e}", exc_info=True)
+
+    def _dispatch_due(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            due, _, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None or job.next_run != due:
+                continue
+
+            # Reschedule from the due time, so interval jobs don't drift; skip runs missed entirely
+            job.next_run = job.trigger.next_after(due)
+            if job.next_run <= now:
+                job.next_run = job.trigger.next_after(now)
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), job.id))
+            self._push_preflight(job)
+            if self.store:
+                self.store.save_job(job)
+
+            if self.executor.is_active(job):
+                logger.warning(f"Job {job.task_name} ({job.id}) is still queued or running, skipping run due at {due}")
+                continue
+            self.executor.submit(job, due, start=False)
+        self.executor.start_ready()
+
+    async def run(self):
+        # Pre-flight tasks started by the loop inherit the tenant
+        with use_tenant(self.tenant) if self.tenant else contextlib.nullcontext():
+            await self._run_loop()
+
+    async def _run_loop(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        logger.info("Scheduler loop started.")
+        while True:
+            self._wakeup.clear()
+            now = self.now()
+            self._dispatch_preflights(now)
+            self._dispatch_due(now)
+            delay = self._seconds_until_next(now)
+            timeout = MAX_SLEEP_SECONDS if delay is None else min(delay, MAX_SLEEP_SECONDS)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class TenantSchedulers:
+    """
+    One AsyncScheduler per tenant, each with its own jobs and job store, all sharing one
+    JobExecutor, so every tenant's jobs compete fairly for the same workers.
+    """
+
+    def __init__(self, tenants: dict, now=_utcnow):
+        self.executor = JobExecutor(now=now)
+        self.schedulers = {
+            name: AsyncScheduler(now=now, executor=self.executor, store=JobStore(tenant.path("schedule", "jobs.db")),
+                                 preflights=TASK_PREFLIGHTS, tenant=name)
+            for name, tenant in tenants.items()
+        }
+        self.executor.on_cancel = lambda job: self.schedulers[job.tenant].job_cancelled(job)
+        self.executor.on_defer = lambda job, until: self.schedulers[job.tenant].defer_job(job, until)
+        self.executor.on_finish = lambda job: self.schedulers[job.tenant]._record_run(job)
+
+    def get(self, tenant_name: str) -> AsyncScheduler:
+        return self.schedulers[tenant_name]
+
+    async def run(self):
+        await asyncio.gather(*(scheduler.run() for scheduler in self.schedulers.values()))
+
+
+# Built on first use, so that importing this module (e.g. for --simulate) creates no job stores
+_schedulers = None
+_schedulers_lock = threading.Lock()
+
+
+def get_schedulers() -> TenantSchedulers:
+    """The schedulers of all tenants."""
+    global _schedulers
+    with _schedulers_lock:
+        if _schedulers is None:
+            _schedulers = TenantSchedulers(TENANTS)
+        return _schedulers
+
+
+def get_scheduler() -> AsyncScheduler:
+    """The scheduler of the current tenant."""
+    return get_schedulers().get(current_tenant().name)
+
 
 def _schedule_job(task_details):
     """Schedules a single job based on its details."""
@@ -126,67 +778,106 @@ def _schedule_job(task_details):
     # Validate the task using the validation map
     validation_func = TASKS_VALIDATION.get(task_name)
     if not validation_func or not validation_func(task_details):
-        logger.warn(f"Task validation failed for '{task_name}'. Skipping.")
+        logger.warning(f"Task validation failed for '{task_name}'. Skipping.")
         return
 
     try:
-        job = schedule.every()
-        # Handle day-of-the-week schedules (e.g., weekly)
-        if 'day' in schedule_info:
-            day_of_week = schedule_info['day']
-            if hasattr(job, day_of_week):
-                job = getattr(job, day_of_week)
-            else:
-                logger.error(f"Invalid day '{day_of_week}' in schedule for task '{task_name}'")
-                return
-        
-        # Handle interval-based schedules (e.g., every 5 minutes)
-        if 'unit' in schedule_info and schedule_info['unit'] != 'weeks':
-             # Fallback for units like 'minutes', 'hours', 'days'
-            interval = schedule_info.get('interval', 1)
-            job.unit = schedule_info['unit']
-            job.interval = interval
-            job.latest = schedule_info.get('latest')
-
-        if 'at' in schedule_info:
-            job = job.at(schedule_info['at'], "Europe/Kyiv")
-        
-        job.do(TASKS[task_name], **task_args)
-        logger.info(f"Scheduled task '{task_name}' with schedule: {schedule_info}")
+        trigger = Trigger(schedule_info)
+        job = ScheduledJob(task_id(task_details), task_name, task_args, trigger, schedule_info)
+        if get_scheduler().add_job(job):
+            logger.info(f"Scheduled task '{task_name}' with schedule: {schedule_info}, next run: {job.next_run}")
 
     except Exception as e:
         logger.error(f"Could not schedule task {task_name}: {e}", exc_info=True)
 
 
-def load_tasks_from_file(file_path: Path):
-    """Loads tasks from a JSON file and schedules them."""
+def read_tasks_from_file(file_path: Path) -> list:
+    """Reads the list of task entries from a JSON schedule file."""
     if not file_path.exists() or file_path.stat().st_size == 0:
         logger.warning(f"{file_path.name} not found or is empty. No tasks loaded.")
-        return
+        return []
 
     try:
         tasks = json.loads(file_path.read_text())
-        for task in tasks:
-            _schedule_job(task)
     except json.JSONDecodeError:
         logger.error(f"Error decoding JSON from {file_path.name}")
+        return []
     except Exception as e:
         logger.error(f"An unexpected error occurred while loading tasks from {file_path.name}: {e}", exc_info=True)
+        return []
+    if not isinstance(tasks, list):
+        logger.error(f"{file_path.name} must contain a list of tasks")
+        return []
+    return tasks
+
+
+def load_tasks_from_file(file_path: Path):
+    """Loads tasks from a JSON file and schedules them."""
+    for task in read_tasks_from_file(file_path):
+        _schedule_job(task)
 
 
-def run_scheduler():
+async def run_scheduler():
     """
-    Runs the main scheduler loop.
+    Runs the main scheduler loop on the current event loop.
     """
     logger.info("Starting scheduler...")
-    
-    reload_all_tasks()
 
-    logger.info("Scheduler started. Entering main loop...")
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    watchers = []
+    for tenant in TENANTS.values():
+        with use_tenant(tenant):
+            asyncio.get_running_loop().create_task(resume_publishes())
+            reload_all_tasks()
+            watcher = FileWatcher(schedule_files(), partial(_reload_tenant, tenant.name))
+            watcher.start()
+            watchers.append(watcher)
+    # One watcher for all tenants: they share the news store and the feed cache
+    news_watcher = None
+    if NEWS_WATCH_MINUTES > 0:
+        news_watcher = asyncio.get_running_loop().create_task(
+            NewsWatcher(reply_message, NEWS_WATCH_MINUTES * 60, list(TENANTS)).run()
+        )
+
+    logger.info(f"Scheduler started for {len(TENANTS)} tenant(s). Entering main loop...")
+    try:
+        await get_schedulers().run()
+    finally:
+        for watcher in watchers:
+            watcher.stop()
+        if news_watcher:
+            news_watcher.cancel()
+
+
+async def resume_publishes():
+    """
+    Finishes publishes that were interrupted by a crash or restart and reports them to the admin.
+    While the posting gate holds, posts not uploaded yet stay pending for their next scheduled run or /post.
+    """
+    hold = get_posting_gate().check()
+    for post_directory_name, result in await asyncio.to_thread(get_publish_queue().resume, hold):
+        if isinstance(result, PublishHeld):
+            await reply_message(f"⏸ Interrupted publish of {post_directory_name} left pending. {result}")
+        elif isinstance(result, Exception):
+            await reply_message(f"⚠️ Could not finish the interrupted publish of {post_directory_name}: {result}")
+        else:
+            await reply_message(f"Interrupted publish of {post_directory_name} finished: https://www.instagram.com/p/{result['media_code']}")
+
+
+async def start_scheduler(application):
+    """Bot startup hook: runs the scheduler as a task on the bot's own event loop."""
+    application.bot_data['scheduler_task'] = asyncio.get_running_loop().create_task(run_scheduler())
+
 
 if __name__ == "__main__":
+    import sys
+
+    if "--simulate" in sys.argv:
+        from .simulation import main
+
+        logging.basicConfig(format='%(levelname)s - %(message)s')
+        # Per-run logs of a simulated week are noise; the report summarizes them
+        logging.getLogger().setLevel(logging.WARNING)
+        sys.exit(main([arg for arg in sys.argv[1:] if arg != "--simulate"]))
+
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    run_scheduler()
+    asyncio.run(run_scheduler())
@@ -0,0 +1,254 @@
+"""
+Offline simulation of the scheduler.
+
+Replays schedule files against a virtual clock: the event loop's time jumps straight to the
+next timer instead of sleeping, and every task is replaced by a stub that only takes a
+simulated amount of time, so a week of schedule runs in seconds without touching Instagram,
+OpenAI or Telegram. Reports start lag per task type, overlapping runs and peak concurrency.
+
+    python -m instagram_bot.scheduler --simulate
+    python -m instagram_bot.scheduler --simulate data/schedule/generated.json --days 7 --workers 2
+    python -m instagram_bot.scheduler --simulate --duration execute_agentic_flow=1800 --json sim.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import selectors
+import statistics
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Simulated run time of each task type, in seconds
+SIMULATED_DURATIONS = {
+    "task_post": 20,
+    "task_story": 60,
+    "execute_agentic_flow": 15 * 60,
+    "news_monitoring": 5 * 60,
+    "reload_all_tasks": 0,
+}
+DEFAULT_DURATION = 60
+PREFLIGHT_DURATION = 10
+# Tasks that remove their job after running, like the real publish tasks
+ONE_SHOT_TASKS = {"task_post", "task_story"}
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Polls without blocking and advances the loop's virtual clock by the time it would have waited."""
+
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events:
+            return events
+        if timeout is None:
+            raise RuntimeError("Simulation has nothing left to wait for")
+        self.loop.advance(timeout)
+        return []
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock only moves when every task is waiting for a timer."""
+
+    def __init__(self):
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.loop = self
+        self._virtual_time = 0.0
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float):
+        self._virtual_time += seconds
+
+
+def _stub(duration: float, result=None):
+    async def run(**kwargs):
+        await asyncio.sleep(duration)
+        return result
+    return run
+
+
+def _percentile(values: list, fraction: float):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else None
+
+
+def build_report(runs: list, start: datetime, end: datetime, workers: int) -> dict:
+    """Summarizes finished runs: start lag per task type, overlapping runs and peak concurrency."""
+    by_task = {}
+    for run in runs:
+        by_task.setdefault(run["task_name"], []).append(run)
+    tasks = {}
+    for task_name, task_runs in sorted(by_task.items()):
+        lags = [run["lag"] for run in task_runs]
+        tasks[task_name] = {
+            "runs": len(task_runs),
+            "lag_p50": _percentile(lags, 0.5),
+            "lag_p90": _percentile(lags, 0.9),
+            "lag_max": max(lags),
+            "lag_mean": statistics.fmean(lags),
+            "results": {result: sum(run["result"] == result for run in task_runs) for result in {run["result"] for run in task_runs}},
+        }
+
+    # Sweep over start/end events; ends sort before starts at the same instant
+    events = sorted([(run["start"], 1) for run in runs] + [(run["end"], -1) for run in runs], key=lambda e: (e[0], e[1]))
+    running = peak = 0
+    peak_at = None
+    for moment, delta in events:
+        running += delta
+        if running > peak:
+            peak, peak_at = running, moment
+
+    ordered = sorted(runs, key=lambda run: run["start"])
+    overlaps = []
+    for i, run in enumerate(ordered):
+        for other in ordered[i + 1:]:
+            if other["start"] >= run["end"]:
+                break
+            # Instant runs (e.g. reloads) don't count as overlapping
+            if min(run["end"], other["end"]) > other["start"]:
+                overlaps.append((run, other))
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "workers": workers,
+        "total_runs": len(runs),
+        "tasks": tasks,
+        "peak_concurrency": peak,
+        "peak_at": peak_at.isoformat() if peak_at else None,
+        "overlaps": len(overlaps),
+        "overlap_examples": [
+            f"{a['task_name']} {a['start'].isoformat()}..{a['end'].isoformat()} with "
+            f"{b['task_name']} {b['start'].isoformat()}..{b['end'].isoformat()}"
+            for a, b in overlaps[:10]
+        ],
+    }
+
+
+def simulate(schedule_files: list, days: float = 7, start: datetime = None, workers: int = None,
+             durations: dict = None) -> dict:
+    """
+    Runs the schedule entries from `schedule_files` for `days` of virtual time and returns the report.
+    Entries are scheduled without the filesystem validation used by the live scheduler.
+    """
+    from . import scheduler
+
+    durations = {**SIMULATED_DURATIONS, **(durations or {})}
+    start = start or datetime.now(timezone.utc)
+    loop = VirtualClockLoop()
+
+    def now() -> datetime:
+        return start + timedelta(seconds=loop.time())
+
+    finished = []
+    stubs = {
+        name: _stub(durations.get(name, DEFAULT_DURATION), scheduler.CancelJob if name in ONE_SHOT_TASKS else None)
+        for name in scheduler.TASKS
+    }
+    preflights = {name: _stub(PREFLIGHT_DURATION) for name in scheduler.TASK_PREFLIGHTS}
+
+    executor = scheduler.JobExecutor(workers=workers or scheduler.SCHEDULER_WORKERS, now=now)
+    sim = scheduler.AsyncScheduler(now=now, executor=executor, preflights=preflights)
+
+    def on_finish(job):
+        finished.append({
+            "task_name": job.task_name,
+            "job_id": job.id,
+            "start": job.last_run,
+            "end": now(),
+            "lag": job.last_lag,
+            "result": job.last_result,
+        })
+    executor.on_cancel = sim.job_cancelled
+    executor.on_finish = on_finish
+
+    for file_path in schedule_files:
+        for task in scheduler.read_tasks_from_file(Path(file_path)):
+            task_name = task.get("task_name")
+            if task_name not in scheduler.TASKS or not task.get("schedule"):
+                logger.warning(f"Skipping task that cannot be simulated: {task}")
+                continue
+            job = scheduler.ScheduledJob(
+                scheduler.task_id(task), task_name, task.get("task_args", {}),
+                scheduler.Trigger(task["schedule"]), task["schedule"],
+            )
+            sim.add_job(job)
+
+    original_tasks = dict(scheduler.TASKS)
+    scheduler.TASKS.update(stubs)
+    try:
+        asyncio.set_event_loop(loop)
+        main = loop.create_task(sim.run())
+        loop.run_until_complete(asyncio.sleep(days * 86400))
+        main.cancel()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    finally:
+        scheduler.TASKS.clear()
+        scheduler.TASKS.update(original_tasks)
+        asyncio.set_event_loop(None)
+        loop.close()
+
+    return build_report(finished, start, start + timedelta(days=days), executor.workers)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Simulated {report['start']} .. {report['end']} with {report['workers']} workers: {report['total_runs']} runs",
+        f"{'task':<24} {'runs':>5} {'lag p50':>9} {'lag p90':>9} {'lag max':>9}  results",
+    ]
+    for task_name, stats in report["tasks"].items():
+        results = ", ".join(f"{result}: {count}" for result, count in sorted(stats["results"].items()))
+        lines.append(
+            f"{task_name:<24} {stats['runs']:>5} {stats['lag_p50']:>8.1f}s {stats['lag_p90']:>8.1f}s {stats['lag_max']:>8.1f}s  {results}"
+        )
+    lines.append(f"Peak concurrency: {report['peak_concurrency']} (at {report['peak_at']})")
+    lines.append(f"Overlapping runs: {report['overlaps']}")
+    lines.extend(f"  {example}" for example in report["overlap_examples"])
+    return "\n".join(lines)
+
+
+def _parse_duration(value: str):
+    task_name, _, seconds = value.partition("=")
+    if not seconds:
+        raise argparse.ArgumentTypeError(f"Expected task_name=seconds, got '{value}'")
+    return task_name, float(seconds)
+
+
+def main(argv: list = None) -> int:
+    from .scheduler import SCHEDULE_TIMEZONE, schedule_files
+
+    parser = argparse.ArgumentParser(description="Replay schedule files against a virtual clock.")
+    parser.add_argument("files", nargs="*", type=Path, default=schedule_files(),
+                        help="Schedule JSON files (default: static.json and generated.json of the default tenant).")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--start", help="Start of the simulation as an ISO date or datetime in Kyiv time (default: now).")
+    parser.add_argument("--workers", type=int, help="Number of scheduler workers (default: SCHEDULER_WORKERS).")
+    parser.add_argument("--duration", type=_parse_duration, action="append", default=[],
+                        help="Simulated run time of a task type as task_name=seconds. May be repeated.")
+    parser.add_argument("--json", type=Path, help="Also write the report to this JSON file.")
+    args = parser.parse_args(argv)
+
+    start = None
+    if args.start:
+        start = datetime.fromisoformat(args.start)
+        if start.tzinfo is None:
+            start = SCHEDULE_TIMEZONE.localize(start)
+        start = start.astimezone(timezone.utc)
+
+    report = simulate(args.files, days=args.days, start=start, workers=args.workers, durations=dict(args.duration))
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Saved report to {args.json}")
+    return 0
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import multiprocessing
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Pillow is imported on first use, not at startup
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+STORY_CACHE_DIR = Path("data/story_cache")
+STORY_BACKGROUND = Path("data/background1.png")
+STORY_DURATION = 15
+
+# Same canvas and layout as instagrapi's StoryBuilder
+STORY_WIDTH = 720
+STORY_HEIGHT = 1280
+CAPTION_WIDTH = 600
+CAPTION_FONT_SIZE = 100
+FONT_CANDIDATES = [
+    "Arial.ttf",
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+]
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+
+
+def story_cache_key(media_pk, caption: str, bgpath: Path = STORY_BACKGROUND) -> str:
+    """Cache key of a rendered story clip: the media, the caption and the background contents."""
+    bgpath = Path(bgpath)
+    background_digest = hashlib.sha256(bgpath.read_bytes()).hexdigest() if bgpath.exists() else ""
+    key = f"{media_pk}\n{caption}\n{background_digest}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def cached_story_path(media_pk, caption: str, bgpath: Path = STORY_BACKGROUND) -> Path:
+    return STORY_CACHE_DIR / f"{story_cache_key(media_pk, caption, bgpath)}.mp4"
+
+
+def _load_font():
+    from PIL import ImageFont
+
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, CAPTION_FONT_SIZE)
+        except OSError:
+            continue
+    return None
+
+
+def compose_story_frame(media_path: Path, caption: str, bgpath: Path = STORY_BACKGROUND) -> "Image.Image":
+    """
+    Draws the single frame of a photo story: the background, the photo scaled to the story
+    width and the caption below it, positioned the same way StoryBuilder does.
+    Raises RuntimeError if the caption cannot be drawn because no font is available.
+    """
+    from PIL import Image, ImageDraw
+
+    frame = Image.new("RGB", (STORY_WIDTH, STORY_HEIGHT), "black")
+    if bgpath and Path(bgpath).exists():
+        with Image.open(bgpath) as background:
+            background = background.convert("RGBA")
+            frame.paste(background, (0, 0), background)
+
+    with Image.open(media_path) as media:
+        media = media.convert("RGBA")
+        media_height = int(media.height * STORY_WIDTH / media.width)
+        media = media.resize((STORY_WIDTH, media_height), Image.Resampling.LANCZOS)
+    media_top = (STORY_HEIGHT - media_height) // 2
+    if media_top > 90:
+        media_top -= 50
+    frame.paste(media, (0, media_top), media)
+
+    if caption:
+        font = _load_font()
+        if font is None:
+            raise RuntimeError("No TrueType font found to draw the story caption")
+        left, top, right, bottom = font.getbbox(caption)
+        label = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+        ImageDraw.Draw(label).text((-left, -top), caption, font=font, fill="white")
+        label = label.resize((CAPTION_WIDTH, max(1, int(label.height * CAPTION_WIDTH / label.width))), Image.Resampling.LANCZOS)
+
+        label_top = media_top + media_height + 50
+        offset = label_top + label.height - STORY_HEIGHT
+        if offset > 0:
+            label_top -= offset + 90
+        frame.paste(label, ((STORY_WIDTH - CAPTION_WIDTH) // 2, label_top), label)
+
+    return frame
+
+
+def encode_still_video(frame_path: Path, output_path: Path, duration: int = STORY_DURATION):
+    """
+    Encodes a still image into an H.264 story video with ffmpeg.
+    The frame is fed once per second and encoded with x264's still-image tuning,
+    which is far cheaper than compositing and encoding every frame with moviepy.
+    """
+    import imageio_ffmpeg
+
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-loop", "1", "-framerate", "1", "-i", str(frame_path),
+        "-t", str(duration), "-r", "24",
+        "-c:v", "libx264", "-preset", "veryfast", "-tune", "stillimage",
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        str(output_path),
+    ]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def render_story_clip(media_path: str, caption: str, bgpath: str, output_path: str, duration: int = STORY_DURATION) -> str:
+    """
+    Renders a photo story clip to output_path. Runs in the story worker process.
+    Falls back to instagrapi's StoryBuilder (moviepy + ImageMagick) if the fast path fails.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_output = output_path.with_suffix(".tmp.mp4")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            frame_path = Path(workdir) / "frame.png"
+            compose_story_frame(Path(media_path), caption, Path(bgpath)).save(frame_path)
+            encode_still_video(frame_path, tmp_output, duration)
+    except Exception as e:
+        logger.warning(f"Fast story rendering failed, falling back to StoryBuilder: {e}")
+        from instagrapi.story import StoryBuilder
+
+        buildout = StoryBuilder(Path(media_path), caption, bgpath=Path(bgpath)).photo(duration)
+        Path(buildout.path).replace(tmp_output)
+    tmp_output.replace(output_path)
+    return str(output_path)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: the bot process runs threads and an event loop, which must not be forked
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def submit_story_clip(media_pk, media_path: Path, caption: str, bgpath: Path = STORY_BACKGROUND) -> Future:
+    """
+    Starts rendering a story clip in the worker process and returns a Future of its path.
+    A clip that is already cached, or already being rendered, is not rendered again.
+    """
+    output_path = cached_story_path(media_pk, caption, bgpath)
+    with _lock:
+        future = _pending.get(output_path)
+        if future is not None:
+            return future
+        future = Future()
+        if output_path.exists():
+            future.set_result(output_path)
+            return future
+
+        logger.info(f"Rendering story clip for media {media_pk} to {output_path}")
+        job = _get_executor().submit(render_story_clip, str(media_path), caption, str(bgpath), str(output_path))
+        _pending[output_path] = job
+
+    def _done(job):
+        with _lock:
+            _pending.pop(output_path, None)
+
+    job.add_done_callback(_done)
+    return job
+
+
+def pending_story_clip(media_pk, caption: str, bgpath: Path = STORY_BACKGROUND):
+    """Returns the Future of a clip that is being rendered right now, or None."""
+    with _lock:
+        return _pending.get(cached_story_path(media_pk, caption, bgpath))
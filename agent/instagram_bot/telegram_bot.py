@@ -1,16 +1,18 @@
+import asyncio
 import logging
 import os
 import shutil
 from datetime import datetime
-from functools import wraps, partial
+from functools import wraps
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters, ConversationHandler
-import schedule
 
 from .config import TELEGRAM_TOKEN, ADMIN_TELEGRAM_ID, SAVED_PROMPTS
-from .instagram import make_post
+from .publish_queue import publish_post
 from .agentic_flow import agentic_flow
 from .news_monitor import news_monitoring_task
+from .posting_gate import DEFAULT_OVERRIDE_HOURS, GATE_TIMEZONE, HOLD, OPEN, describe, get_posting_gate
+from .tenants import TENANTS, current_tenant, data_path, use_tenant
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +34,10 @@ def admin_only(func):
             await update.message.reply_text("You are not authorized to use this bot.")
             return
         
-        return await func(update, context, *args, **kwargs)
+        # Commands act on the tenant selected with /tenant, the first one by default
+        tenant_name = context.user_data.get("tenant") if context.user_data is not None else None
+        with use_tenant(tenant_name or next(iter(TENANTS))):
+            return await func(update, context, *args, **kwargs)
     return wrapped
 
 
@@ -47,13 +52,15 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     help_text = """
 Available commands:
 /help - Show this help message
+/tenant [name] - Show the tenants or switch the account the commands act on
 /schedule - Show the scheduled tasks
-/reload_all_tasks - Reload all tasks
+/reload_all_tasks [full] - Reload changed tasks, or rebuild all with 'full'
 /run_saved_flow <saved_flow_name> - Run the saved flow, e.g. /run_saved_flow WEEKLY_PLANNING
 /list_future - List scheduled future posts
 /delete_future_post <post_dir_name> - Delete a scheduled future post
 /post <post_dir_name> - Post a future post to Instagram
 /news_monitoring - Show the news monitoring task
+/posting_gate [hold|open|clear] [hours] - Show the posting gate, or hold or open posting whatever the news says
 """
     await update.message.reply_text(help_text)
 
@@ -61,7 +68,7 @@ Available commands:
 @admin_only
 async def list_future_posts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.info(f"Received /list_future command from {update.effective_user.name}")
-    future_posts_dir = "data/future_posts"
+    future_posts_dir = data_path("future_posts")
     if not os.path.exists(future_posts_dir) or not os.listdir(future_posts_dir):
         await update.message.reply_text("No future posts found.")
         return
@@ -92,7 +99,7 @@ async def delete_future_post(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
     post_dir_name = context.args[0]
-    future_posts_dir = "data/future_posts"
+    future_posts_dir = data_path("future_posts")
     post_dir_path = os.path.join(future_posts_dir, post_dir_name)
 
     if not os.path.exists(post_dir_path) or not os.path.isdir(post_dir_path):
@@ -117,18 +124,26 @@ async def post(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     post_dir_name = context.args[0]
-    future_posts_dir = "data/future_posts"
+    future_posts_dir = data_path("future_posts")
     post_dir_path = os.path.join(future_posts_dir, post_dir_name)
 
     if not os.path.exists(post_dir_path) or not os.path.isdir(post_dir_path):
         await update.message.reply_text(f"Future post '{post_dir_name}' not found.")
         return
+
+    hold = get_posting_gate().check()
+    if hold:
+        await update.message.reply_text(f"{describe(hold)}.\nUse /posting_gate open to publish anyway.")
+        return
         
     await update.message.reply_text(f"Posting '{post_dir_name}' to Instagram...")
 
     try:
-        media = make_post(post_dir_name)
-        post_url = f"https://www.instagram.com/p/{media.code}"
+        record = await asyncio.to_thread(publish_post, post_dir_name)
+        post_url = f"https://www.instagram.com/p/{record['media_code']}"
+        if record["already_published"]:
+            await update.message.reply_text(f"Post '{post_dir_name}' was already published.\n\n🔗 {post_url}")
+            return
         logger.info(f"Successfully posted '{post_dir_name}' to Instagram.")
         await update.message.reply_text(f"✅ Post '{post_dir_name}' is live!\n\n🔗 {post_url}")
     except Exception as e:
@@ -175,33 +190,40 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.info(f"Received /schedule command from {update.effective_user.name}")
     
-    jobs = schedule.get_jobs()
+    from .scheduler import get_scheduler, SCHEDULE_TIMEZONE
+    scheduler = get_scheduler()
+    jobs = scheduler.get_jobs()
 
     if not jobs:
         await update.message.reply_text("No scheduled tasks found.")
         return
 
-    schedules = ["*Current Schedule*"]
+    schedules = [f"*Current Schedule* ({current_tenant().name})" if len(TENANTS) > 1 else "*Current Schedule*"]
     for job in jobs:
-        func = job.job_func
-        if isinstance(func, partial):
-            task_name = func.func.__name__
-            task_args = func.keywords
-        else:
-            task_name = func.__name__
-            task_args = {}
-
-        schedule_str = f"• `{task_name}`"
-        if task_args:
-            schedule_str += f" with args `{task_args}`"
-        
-        next_run_time = job.next_run.strftime('%Y-%m-%d %H:%M:%S %Z') if job.next_run else 'N/A'
+        schedule_str = f"• `{job.task_name}`"
+        if job.task_args:
+            schedule_str += f" with args `{job.task_args}`"
+
+        next_run_time = job.next_run.astimezone(SCHEDULE_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S %Z') if job.next_run else 'N/A'
         schedule_str += f"\n  Next run: `{next_run_time}`"
-        
+        if job.last_lag is not None:
+            schedule_str += f"\n  Last run: start lag `{job.last_lag:.1f}s`, result `{job.last_result}`"
+        if job.preflight_result is not None:
+            schedule_str += f"\n  Pre-flight: `{job.preflight_result}`"
+
         schedules.append(schedule_str)
-    
+
+    stats = scheduler.executor.stats()
+    executor_str = f"• Workers: `{stats['running']}/{stats['workers']}` running, `{stats['queued']}` queued"
+    if stats['lag_runs']:
+        executor_str += f"\n  Start lag over last {stats['lag_runs']} runs: p50 `{stats['lag_p50']:.1f}s`, max `{stats['lag_max']:.1f}s`"
+    schedules.append(executor_str)
+
+    hold = get_posting_gate().check()
+    schedules.append(f"• Posting gate: `{'hold' if hold else 'open'}`" + (f"\n  {describe(hold)}" if hold else ""))
+
     # add current time
-    schedules.append(f"• Current time: `{datetime.now().strftime('%Y-%m-%d %H:%M:%S %Z')}`")
+    schedules.append(f"• Current time: `{datetime.now(SCHEDULE_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S %Z')}`")
 
     await update.message.reply_text("\n".join(schedules), parse_mode='Markdown')
 
@@ -236,20 +258,85 @@ async def news_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     async def reply_photo(photo_path: str) -> None:
         await update.message.reply_photo(photo=open(photo_path, "rb"))
     
-    await news_monitoring_task(reply_message, reply_photo)
-    await update.message.reply_text("News monitoring task completed.")
+    timings = await news_monitoring_task(reply_message, reply_photo)
+    await update.message.reply_text(f"News monitoring task completed.\nStages: {timings}")
 
 @admin_only
 async def reload_all_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.info(f"Received /reload_all_tasks command from {update.effective_user.name}")
     from .scheduler import reload_all_tasks
-    reload_all_tasks()
-    await update.message.reply_text("All tasks reloaded.")
+    full = bool(context.args) and context.args[0].lower() == "full"
+    reload_all_tasks(full=full)
+    await update.message.reply_text("All tasks reloaded." if full else "Tasks reloaded. Use /reload_all_tasks full to rebuild all jobs.")
+
+
+@admin_only
+async def posting_gate_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    logger.info(f"Received /posting_gate command from {update.effective_user.name}")
+    gate = get_posting_gate()
+    usage = "Usage: /posting_gate [hold|open|clear] [hours]"
+
+    if context.args:
+        action = context.args[0].lower()
+        if action == "clear":
+            removed = gate.clear_override()
+            await update.message.reply_text("Override cleared, the news verdict applies again." if removed else "There was no override.")
+            return
+        if action not in (HOLD, OPEN):
+            await update.message.reply_text(usage)
+            return
+        try:
+            hours = float(context.args[1]) if len(context.args) > 1 else DEFAULT_OVERRIDE_HOURS
+            gate.override(action, hours, reason=f"set by {update.effective_user.name}")
+        except ValueError as e:
+            await update.message.reply_text(f"{e}\n{usage}")
+            return
+
+    hold = gate.check()
+    lines = [f"Posting gate: {'hold' if hold else 'open'}"]
+    for name, record in gate.status().items():
+        expires_at = datetime.fromisoformat(record["expires_at"]).astimezone(GATE_TIMEZONE).strftime('%Y-%m-%d %H:%M')
+        label = "Admin override" if name == "admin" else "News verdict"
+        lines.append(f"• {label}: {record['status']} until {expires_at} ({record['reason']})")
+    if not context.args:
+        lines.append(usage)
+    await update.message.reply_text("\n".join(lines))
+
+
+@admin_only
+async def tenant_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    logger.info(f"Received /tenant command from {update.effective_user.name}")
+
+    if context.args:
+        tenant_name = context.args[0]
+        if tenant_name not in TENANTS:
+            await update.message.reply_text(f"Unknown tenant '{tenant_name}'. Available: {', '.join(TENANTS)}")
+            return
+        context.user_data["tenant"] = tenant_name
+        # The agent conversation belongs to the previous tenant
+        context.chat_data.pop("chat_history", None)
+        await update.message.reply_text(f"Commands now act on '{tenant_name}' (@{TENANTS[tenant_name].instagram_username}). The agent conversation was reset.")
+        return
+
+    selected = current_tenant().name
+    lines = ["Tenants:"]
+    for name, tenant in TENANTS.items():
+        marker = "→" if name == selected else "•"
+        lines.append(f"{marker} {name} (@{tenant.instagram_username}, data in {tenant.data_root})")
+    lines.append("Switch with /tenant <name>")
+    await update.message.reply_text("\n".join(lines))
 
 
-def run_bot():
+def run_bot(on_startup=None):
+    """
+    Runs the bot. `on_startup` is an optional coroutine function called with the application
+    once its event loop is running, e.g. to start the scheduler on the same loop.
+    """
     logger.info("Starting telegram bot polling...")
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    builder = Application.builder().token(TELEGRAM_TOKEN)
+    if on_startup:
+        builder = builder.post_init(on_startup)
+    application = builder.build()
     APPLICATION['tg'] = application
 
     application.add_handler(ConversationHandler(
@@ -261,6 +348,7 @@ def run_bot():
     ))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("myid", myid))
+    application.add_handler(CommandHandler("tenant", tenant_command))
 
     application.add_handler(CommandHandler("list_future", list_future_posts))
     application.add_handler(CommandHandler("delete_future_post", delete_future_post))
@@ -269,5 +357,6 @@ def run_bot():
     application.add_handler(CommandHandler("reload_all_tasks", reload_all_tasks))
     application.add_handler(CommandHandler("run_saved_flow", run_saved_flow))
     application.add_handler(CommandHandler("news_monitoring", news_monitoring))
+    application.add_handler(CommandHandler("posting_gate", posting_gate_command))
 
     application.run_polling()
@@ -0,0 +1,124 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .config import ADMIN_TELEGRAM_ID, INSTAGRAM_PASSWORD, INSTAGRAM_USERNAME, TENANTS_FILE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_ROOT = Path("data")
+DEFAULT_TENANT_NAME = "default"
+
+
+class Tenant:
+    """
+    One brand served by the bot: its Instagram account, the data directory holding its drafts,
+    posts, guides and schedule, and the Telegram chat its notifications go to.
+    """
+
+    def __init__(self, name: str, data_root: Path, instagram_username: str, instagram_password: str,
+                 session_file: Path = None, admin_chat_id: str = None):
+        self.name = name
+        self.data_root = Path(data_root)
+        self.instagram_username = instagram_username
+        self.instagram_password = instagram_password
+        self.session_file = Path(session_file) if session_file else self.data_root / "instagram_session.json"
+        self.admin_chat_id = admin_chat_id or (ADMIN_TELEGRAM_ID.split(',')[0].strip() if ADMIN_TELEGRAM_ID else None)
+
+    def path(self, *parts) -> Path:
+        return self.data_root.joinpath(*parts)
+
+    def __repr__(self):
+        return f"<Tenant {self.name} @{self.instagram_username} {self.data_root}>"
+
+
+def _tenant_from_entry(entry: dict) -> Tenant:
+    password = entry.get("instagram_password")
+    if entry.get("instagram_password_env"):
+        password = os.getenv(entry["instagram_password_env"])
+    return Tenant(
+        name=entry["name"],
+        data_root=entry.get("data_root", DEFAULT_DATA_ROOT / entry["name"]),
+        instagram_username=entry["instagram_username"],
+        instagram_password=password,
+        session_file=entry.get("session_file"),
+        admin_chat_id=entry.get("admin_chat_id"),
+    )
+
+
+def load_tenants(path: Path = None) -> dict:
+    """
+    Reads the tenant registry. Without a registry file the bot serves a single default tenant
+    configured by the INSTAGRAM_* environment variables, with its data in 'data/'.
+    """
+    path = Path(path or TENANTS_FILE)
+    if not path.exists():
+        default = Tenant(DEFAULT_TENANT_NAME, DEFAULT_DATA_ROOT, INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD,
+                         session_file=Path(f"{INSTAGRAM_USERNAME}.json"))
+        return {default.name: default}
+
+    tenants = {}
+    for entry in json.loads(path.read_text(encoding="utf-8")):
+        tenant = _tenant_from_entry(entry)
+        if tenant.name in tenants:
+            raise ValueError(f"Duplicate tenant name '{tenant.name}' in {path}")
+        tenants[tenant.name] = tenant
+    if not tenants:
+        raise ValueError(f"No tenants defined in {path}")
+    logger.info(f"Loaded {len(tenants)} tenants from {path}: {', '.join(tenants)}")
+    return tenants
+
+
+TENANTS = load_tenants()
+_current = contextvars.ContextVar("tenant", default=None)
+
+
+def get_tenant(name: str) -> Tenant:
+    if name not in TENANTS:
+        raise KeyError(f"Unknown tenant '{name}'. Available: {', '.join(TENANTS)}")
+    return TENANTS[name]
+
+
+def current_tenant() -> Tenant:
+    """The tenant the current task or thread works for; the first registered tenant by default."""
+    return _current.get() or next(iter(TENANTS.values()))
+
+
+@contextmanager
+def use_tenant(tenant):
+    """Scopes the enclosed code, and the tasks and to_thread calls it starts, to a tenant (or tenant name)."""
+    if isinstance(tenant, str):
+        tenant = get_tenant(tenant)
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def data_path(*parts) -> Path:
+    """A path inside the current tenant's data directory."""
+    return current_tenant().path(*parts)
+
+
+def tenant_file(relative: str, default: Path = None) -> Path:
+    """
+    A file from the current tenant's data directory if the tenant has its own copy,
+    otherwise the shared one (`default`, or the same name under 'data/').
+    """
+    path = current_tenant().path(relative)
+    if path.exists():
+        return path
+    return Path(default) if default else DEFAULT_DATA_ROOT / relative
+
+
+def start_thread(target, *args) -> threading.Thread:
+    """Starts a daemon thread that runs `target` in the current tenant's context."""
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(target, *args), daemon=True)
+    thread.start()
+    return thread
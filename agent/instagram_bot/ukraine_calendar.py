@@ -0,0 +1,116 @@
+"""
+Offline calendar of Ukrainian public holidays, memorial days and observances.
+
+Fixed dates are listed with the years they apply to (several holidays moved in 2023), movable
+ones are computed: Easter by the Orthodox (Julian) computus, Trinity from Easter, and memorial
+days falling on the n-th weekday of a month. Each year is computed once into a date -> days
+lookup table.
+
+    python -m instagram_bot.ukraine_calendar 2026    # the calendar of a year
+"""
+import logging
+from datetime import date, timedelta
+from functools import cache
+
+logger = logging.getLogger(__name__)
+
+HOLIDAY = "holiday"
+MEMORIAL = "memorial"
+OBSERVANCE = "observance"
+
+# (month, day, name, kind, first year, last year); None means no limit
+FIXED_DAYS = [
+    (1, 1, "Новий рік", HOLIDAY, None, None),
+    (1, 7, "Різдво Христове (за юліанським календарем)", HOLIDAY, None, 2023),
+    (1, 22, "День Соборності України", OBSERVANCE, None, None),
+    (1, 29, "День пам'яті Героїв Крут", MEMORIAL, None, None),
+    (2, 20, "День Героїв Небесної Сотні", MEMORIAL, 2015, None),
+    (2, 24, "Річниця повномасштабного вторгнення росії", MEMORIAL, 2023, None),
+    (3, 8, "Міжнародний жіночий день", HOLIDAY, None, None),
+    (4, 26, "День пам'яті жертв Чорнобильської катастрофи", MEMORIAL, None, None),
+    (5, 1, "День праці", HOLIDAY, None, None),
+    (5, 8, "День пам'яті та перемоги над нацизмом у Другій світовій війні", HOLIDAY, 2023, None),
+    (5, 9, "День перемоги над нацизмом у Другій світовій війні", HOLIDAY, None, 2022),
+    (5, 18, "День пам'яті жертв геноциду кримськотатарського народу", MEMORIAL, None, None),
+    (6, 22, "День скорботи і вшанування пам'яті жертв війни", MEMORIAL, None, None),
+    (6, 28, "День Конституції України", HOLIDAY, None, None),
+    (7, 15, "День Української Державності", HOLIDAY, 2024, None),
+    (7, 28, "День Української Державності", HOLIDAY, 2022, 2023),
+    (8, 24, "День Незалежності України", HOLIDAY, None, None),
+    (8, 29, "День пам'яті захисників України, які загинули в боротьбі за незалежність", MEMORIAL, 2019, None),
+    (9, 29, "День пам'яті жертв Бабиного Яру", MEMORIAL, None, None),
+    (10, 1, "День захисників і захисниць України", HOLIDAY, 2023, None),
+    (10, 14, "День захисників і захисниць України", HOLIDAY, 2015, 2022),
+    (11, 21, "День Гідності та Свободи", OBSERVANCE, 2014, None),
+    (12, 6, "День Збройних Сил України", OBSERVANCE, None, None),
+    (12, 25, "Різдво Христове", HOLIDAY, 2017, None),
+]
+
+# (month, weekday (Monday = 0), n-th occurrence, name, kind)
+NTH_WEEKDAY_DAYS = [
+    (5, 6, 3, "День пам'яті жертв політичних репресій", MEMORIAL),
+    (11, 5, 4, "День пам'яті жертв голодоморів", MEMORIAL),
+]
+
+# Days after Easter
+EASTER_DAYS = [
+    (0, "Великдень", HOLIDAY),
+    (49, "Трійця", HOLIDAY),
+]
+
+
+def orthodox_easter(year: int) -> date:
+    """Orthodox Easter Sunday: the Julian computus (Meeus), converted to the Gregorian calendar."""
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    # Easter is never near the end of February, where the calendar difference changes
+    return date(year, month, day + 1) + timedelta(days=year // 100 - year // 400 - 2)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+@cache
+def year_calendar(year: int) -> dict:
+    """The days of a year, as date -> tuple of (name, kind). Computed once per year."""
+    days = []
+    for month, day, name, kind, first_year, last_year in FIXED_DAYS:
+        if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+            days.append((date(year, month, day), name, kind))
+    for month, weekday, n, name, kind in NTH_WEEKDAY_DAYS:
+        days.append((nth_weekday(year, month, weekday, n), name, kind))
+    easter = orthodox_easter(year)
+    for offset, name, kind in EASTER_DAYS:
+        days.append((easter + timedelta(days=offset), name, kind))
+
+    table = {}
+    for day, name, kind in sorted(days):
+        table[day] = table.get(day, ()) + ((name, kind),)
+    return table
+
+
+def days_on(day: date) -> list:
+    """Holidays, memorial days and observances on a date, as dicts with date, name and kind."""
+    return [{"date": day.isoformat(), "name": name, "kind": kind} for name, kind in year_calendar(day.year).get(day, ())]
+
+
+def days_between(start: date, end: date) -> list:
+    """The days from `start` to `end` inclusive, in date order."""
+    result = []
+    for year in range(start.year, end.year + 1):
+        for day in sorted(year_calendar(year)):
+            if start <= day <= end:
+                result.extend(days_on(day))
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else date.today().year
+    for entry in days_between(date(year, 1, 1), date(year, 12, 31)):
+        print(f"{entry['date']}  {entry['kind']:<10}  {entry['name']}")